@@ -0,0 +1,114 @@
+"""
+Benchmark suite for signal_functions and the BharatQuant v4 pipeline.
+
+Runs every building block over a universe of deterministic synthetic tickers (no network) and reports
+per-call latency percentiles and the peak traced memory of each stage.
+
+    python benchmarks/bench_signal_functions.py --tickers 900 --daily-bars 250 --hourly-bars 420
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "core"))
+
+import signal_functions as sf
+import synthetic_bars
+
+silent = logging.getLogger("benchmark")
+silent.setLevel(logging.CRITICAL)
+
+def rsi_series(df):
+    close = df['Close']
+    delta = close.diff()
+    avg_gain = delta.clip(lower=0).ewm(alpha=1/14, min_periods=14, adjust=False).mean()
+    avg_loss = (-delta.clip(upper=0)).ewm(alpha=1/14, min_periods=14, adjust=False).mean()
+    return 100 - (100 / (1 + avg_gain / avg_loss))
+
+def build_universe(tickers: int, daily_bars: int, hourly_bars: int):
+    universe = []
+    for i in range(tickers):
+        symbol = f"SYN{i:04d}.NS"
+        df_daily = synthetic_bars.make_bars(symbol, daily_bars, "1d")
+        df_hourly = synthetic_bars.make_bars(symbol, hourly_bars, "1h")
+        universe.append((symbol, df_daily, df_hourly, rsi_series(df_hourly)))
+    return universe
+
+def aggregator_inputs(symbol, df_hourly, rsi):
+    return (
+        sf.detect_rsi_divergence(df_hourly, rsi),
+        sf.calculate_macd_signal(symbol, df_hourly, "1h"),
+        sf.detect_bb_squeeze(df_hourly),
+        sf.calculate_cmf(symbol, df_hourly.copy(), "14", "1h", 20),
+        sf.detect_market_structure(df_hourly),
+        {'is_bullish_macro': True}
+    )
+
+def cases(universe):
+    """
+    (name, callable(entry)) pairs. Each callable receives one universe entry (symbol, daily, hourly, rsi).
+    """
+    prepared = {entry[0]: aggregator_inputs(entry[0], entry[2], entry[3]) for entry in universe}
+    return [
+        ("calculate_rsi", lambda e: sf.calculate_rsi(e[0], e[2], 14, "1h")),
+        ("calculate_macd_signal", lambda e: sf.calculate_macd_signal(e[0], e[2], "1h")),
+        ("calculate_bollinger_bands", lambda e: sf.calculate_bollinger_bands(e[0], e[2], 20, 2)),
+        ("calculate_cmf", lambda e: sf.calculate_cmf(e[0], e[2], "14", "1h", 20)),
+        ("detect_market_structure", lambda e: sf.detect_market_structure(e[2])),
+        ("detect_rsi_divergence", lambda e: sf.detect_rsi_divergence(e[2], e[3])),
+        ("detect_bb_squeeze", lambda e: sf.detect_bb_squeeze(e[2])),
+        ("signal_aggregator_v4", lambda e: sf.signal_aggregator_v4(silent, *prepared[e[0]])),
+        ("calculate_bharatquant_v4", lambda e: sf.calculate_bharatquant_v4(silent, e[0], e[1], e[2])),
+    ]
+
+def run_case(fn, universe, repeat: int, trace_memory: bool = True):
+    latencies = []
+    for _ in range(repeat):
+        for entry in universe:
+            start = time.perf_counter()
+            fn(entry)
+            latencies.append(time.perf_counter() - start)
+    if not trace_memory:
+        return np.array(latencies) * 1000, 0
+    # Memory is traced in a separate pass since tracemalloc slows every allocation down
+    tracemalloc.start()
+    for entry in universe:
+        fn(entry)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return np.array(latencies) * 1000, peak
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark signal_functions building blocks on synthetic bars.")
+    parser.add_argument("--tickers", type=int, default=900)
+    parser.add_argument("--daily-bars", type=int, default=250)
+    parser.add_argument("--hourly-bars", type=int, default=420)
+    parser.add_argument("--repeat", type=int, default=1, help="Passes over the universe per case")
+    parser.add_argument("--only", nargs="*", help="Run only the named cases")
+    parser.add_argument("--skip-memory", action="store_true", help="Skip the tracemalloc pass")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    universe = build_universe(args.tickers, args.daily_bars, args.hourly_bars)
+    print(f"Built {args.tickers} synthetic tickers ({args.daily_bars} daily / {args.hourly_bars} hourly bars) "
+          f"in {time.perf_counter() - start:.2f}s")
+    frame_bytes = sum(int(e[1].memory_usage(deep=True).sum() + e[2].memory_usage(deep=True).sum()) for e in universe)
+    print(f"Universe input frames hold {frame_bytes / 2**20:.1f} MiB\n")
+
+    header = f"{'case':<28}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}{'total s':>9}{'peak MiB':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, fn in cases(universe):
+        if args.only and name not in args.only:
+            continue
+        latencies, peak = run_case(fn, universe, args.repeat, not args.skip_memory)
+        p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+        print(f"{name:<28}{p50:>9.3f}{p90:>9.3f}{p99:>9.3f}{latencies.max():>9.3f}"
+              f"{latencies.sum() / 1000 / args.repeat:>9.2f}{peak / 2**20:>10.2f}")
+
+if __name__ == "__main__":
+    main()
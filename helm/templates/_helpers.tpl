@@ -63,6 +63,22 @@ Function to replace volumes
 - name: {{ $item.name }}
   configMap:
     name: {{ $item.configmap }}
+    {{- if $item.optional }}
+    optional: true
+    {{- end }}
+{{- end }}
+{{- end }}
+{{- if $volumes.emptyDir }}
+{{- range $item := $volumes.emptyDir }}
+- name: {{ $item.name }}
+  emptyDir: {}
+{{- end }}
+{{- end }}
+{{- if $volumes.persistentVolumeClaim }}
+{{- range $item := $volumes.persistentVolumeClaim }}
+- name: {{ $item.name }}
+  persistentVolumeClaim:
+    claimName: {{ $item.claimName }}
 {{- end }}
 {{- end }}
 {{- end }}
@@ -1,14 +1,25 @@
 from fastapi import FastAPI
 import uvicorn
 from fastapi.encoders import jsonable_encoder
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 import datetime
+import hashlib
+import json
 import logging
+import socket
+import sqlite3
 import sys
 import os
+import threading
+import time
 from openai import AsyncOpenAI
 import asyncio
 from pydantic import BaseModel
+from typing import List, Optional
+try:
+    import prometheus_client
+except ImportError:
+    prometheus_client = None
 
 # Configure logging to print to stdout
 logging.basicConfig(
@@ -21,12 +32,147 @@ logger = logging.getLogger(__name__)
 
 class Item(BaseModel):
     prompt: str
+    # Tickers covered by the prompt; enables reuse of today's per-ticker verdicts
+    tickers: Optional[List[str]] = None
 
 # Get values from environment variables (Kubernetes ConfigMap/Secret)
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 MAINTENANCE_STATUS = os.getenv("MAINTENANCE_STATUS")
+MIE_CACHE_PATH = os.getenv("MIE_CACHE_PATH", "/app/cache/market-intel.sqlite3")
+MIE_CACHE_TTL = float(os.getenv("MIE_CACHE_TTL", "43200"))
+IST = datetime.timezone(datetime.timedelta(hours=5, minutes=30))
+
+def trading_day() -> str:
+    return datetime.datetime.now(IST).date().isoformat()
+
+def normalize_symbol(symbol: str) -> str:
+    return str(symbol).strip().upper().removesuffix(".NS")
+
+class ResponseCache:
+    """
+    SQLite cache of successful model verdicts.
+
+    Whole responses are keyed by a hash of the whitespace-normalized prompt. Each analysed ticker is also
+    stored for the current trading day (IST), so a request whose tickers were all analysed today can be
+    answered without a model call even if the prompt is chunked differently. Entries expire after ttl_seconds.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS prompts (key TEXT PRIMARY KEY, result TEXT, created REAL)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS tickers (symbol TEXT, trading_day TEXT, result TEXT, created REAL, "
+                               "PRIMARY KEY (symbol, trading_day))")
+        self.prompt_hits = 0
+        self.ticker_hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.stores = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def prompt_key(prompt: str) -> str:
+        return hashlib.sha256(" ".join(prompt.split()).encode()).hexdigest()
+
+    def get(self, prompt: str, tickers: List[str] = None):
+        """
+        Returns (result, source) with source "prompt" or "ticker", or (None, None) on a miss.
+        """
+        fresh_after = time.time() - self.ttl_seconds
+        with self._lock:
+            row = self._conn.execute("SELECT result FROM prompts WHERE key = ? AND created > ?",
+                                     (self.prompt_key(prompt), fresh_after)).fetchone()
+            if row is not None:
+                self.prompt_hits += 1
+                return row[0], "prompt"
+            if tickers:
+                symbols = list(dict.fromkeys(normalize_symbol(ticker) for ticker in tickers))
+                rows = self._conn.execute(
+                    f"SELECT symbol, result FROM tickers WHERE trading_day = ? AND created > ? "
+                    f"AND symbol IN ({','.join('?' * len(symbols))})",
+                    [trading_day(), fresh_after, *symbols]
+                ).fetchall()
+                if len(rows) == len(symbols):
+                    by_symbol = {symbol: json.loads(result) for symbol, result in rows}
+                    self.ticker_hits += 1
+                    merged = {"mie_analysis": {"status": "success", "results": [by_symbol[symbol] for symbol in symbols]}}
+                    return json.dumps(merged), "ticker"
+            self.misses += 1
+            return None, None
+
+    def put(self, prompt: str, result: str) -> None:
+        """
+        Stores a model response unless it is not valid JSON or reports a failed analysis.
+        """
+        try:
+            analysis = json.loads(result)["mie_analysis"]
+        except (ValueError, KeyError, TypeError):
+            return
+        if analysis.get("status") == "failed":
+            return
+        now = time.time()
+        day = trading_day()
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO prompts VALUES (?, ?, ?)", (self.prompt_key(prompt), result, now))
+            for entry in analysis.get("results", []):
+                if isinstance(entry, dict) and entry.get("symbol"):
+                    self._conn.execute("INSERT OR REPLACE INTO tickers VALUES (?, ?, ?, ?)",
+                                       (normalize_symbol(entry["symbol"]), day, json.dumps(entry), now))
+            self._conn.execute("DELETE FROM prompts WHERE created <= ?", (now - self.ttl_seconds,))
+            self._conn.execute("DELETE FROM tickers WHERE created <= ?", (now - self.ttl_seconds,))
+            self.stores += 1
+
+    def invalidate(self, ticker: str = None) -> int:
+        """
+        Drops every entry, or only one ticker's entries (prompts are keyed by hash, so those are kept).
+        Returns the number of rows removed.
+        """
+        with self._lock, self._conn:
+            if ticker is None:
+                removed = self._conn.execute("DELETE FROM prompts").rowcount + self._conn.execute("DELETE FROM tickers").rowcount
+            else:
+                removed = self._conn.execute("DELETE FROM tickers WHERE symbol = ?", (normalize_symbol(ticker),)).rowcount
+            self.invalidations += 1
+            return removed
+
+    def record_bypass(self) -> None:
+        with self._lock:
+            self.bypasses += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            prompts = self._conn.execute("SELECT COUNT(*) FROM prompts").fetchone()[0]
+            tickers = self._conn.execute("SELECT COUNT(*) FROM tickers WHERE trading_day = ?", (trading_day(),)).fetchone()[0]
+            return {
+                "prompt_hits": self.prompt_hits,
+                "ticker_hits": self.ticker_hits,
+                "misses": self.misses,
+                "bypasses": self.bypasses,
+                "stores": self.stores,
+                "invalidations": self.invalidations,
+                "prompt_entries": prompts,
+                "ticker_entries_today": tickers,
+                "ttl_seconds": self.ttl_seconds
+            }
+
 market_intel = FastAPI()
 client = AsyncOpenAI()
+if prometheus_client is not None:
+    UPSTREAM_SECONDS = prometheus_client.Histogram(
+        "market_intel_upstream_seconds", "Latency of model completion calls", ["outcome"],
+        buckets=(1, 5, 10, 30, 60, 120, 180, 240, 300, 600)
+    )
+else:
+    UPSTREAM_SECONDS = None
+
+def observe_upstream(outcome: str, started: float) -> None:
+    if UPSTREAM_SECONDS is not None:
+        UPSTREAM_SECONDS.labels(outcome).observe(time.perf_counter() - started)
+response_cache = ResponseCache(MIE_CACHE_PATH, MIE_CACHE_TTL) if MIE_CACHE_TTL > 0 else None
 
 @market_intel.get("/health")
 async def health_check():
@@ -38,8 +184,29 @@ async def health_check():
             "timestamp": f"{time_stamp}"
     })
 
+@market_intel.get("/metrics")
+async def prometheus_metrics():
+    if prometheus_client is None:
+        return JSONResponse({"status": "prometheus_client is not installed"}, status_code=503)
+    return Response(prometheus_client.generate_latest(), media_type=prometheus_client.CONTENT_TYPE_LATEST)
+
+@market_intel.get("/cache/stats")
+async def cache_stats():
+    if response_cache is None:
+        return JSONResponse({"status": "Response cache is disabled"})
+    # The cache is per pod, so report which pod answered
+    return JSONResponse({**response_cache.stats(), "pod": socket.gethostname()})
+
+@market_intel.delete("/cache")
+async def invalidate_cache(ticker: Optional[str] = None):
+    if response_cache is None:
+        return JSONResponse({"status": "Response cache is disabled"})
+    removed = response_cache.invalidate(ticker)
+    logging.info(f"Invalidated {removed} cache entries" + (f" for {ticker}" if ticker else ""))
+    return JSONResponse({"status": "OK", "removed": removed, "pod": socket.gethostname()})
+
 @market_intel.post("/chat")
-async def push_prompt(item: Item):
+async def push_prompt(item: Item, cache: bool = True):
     time_stamp = datetime.datetime.now(datetime.UTC)
     if MAINTENANCE_STATUS == "on":
         logging.info("Skipping API call as service is in maintenance mode")
@@ -50,6 +217,19 @@ async def push_prompt(item: Item):
             "result": "Prompt is empty",
             "timestamp": f"{time_stamp}"
         })
+    if response_cache is not None:
+        if cache:
+            cached_result, source = response_cache.get(item.prompt, item.tickers)
+            if cached_result is not None:
+                logging.info(f"Serving analysis from the response cache ({source})")
+                return JSONResponse({
+                    "result": cached_result,
+                    "timestamp": f"{time_stamp}",
+                    "cache": source
+                })
+        else:
+            response_cache.record_bypass()
+    started = time.perf_counter()
     try:
         completion = await client.chat.completions.create(
         model="gpt-5",
@@ -62,6 +242,7 @@ async def push_prompt(item: Item):
         response_format={"type": "json_object"}
         )
     except Exception as e:
+        observe_upstream("error", started)
         logging.info(f"API call failed. Error: {e}")
         return JSONResponse({
             "result": "failed",
@@ -70,6 +251,7 @@ async def push_prompt(item: Item):
         })
     time_stamp = datetime.datetime.now(datetime.UTC)
     final_result = completion.choices[0].message.content
+    observe_upstream("success" if final_result else "empty", started)
     if not final_result:
         logging.info("Result is empty, printing model response.")
         print(completion)
@@ -78,6 +260,8 @@ async def push_prompt(item: Item):
             "timestamp": f"{time_stamp}",
             "error": "Result is empty"
         })
+    if response_cache is not None:
+        response_cache.put(item.prompt, final_result)
     return JSONResponse({
             "result": f"{final_result}",
             "timestamp": f"{time_stamp}"
@@ -1,15 +1,35 @@
 from fastapi import FastAPI
 import uvicorn
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.encoders import jsonable_encoder
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import signal_functions as sf
+import prewarm
+import metrics
+import profiling
+import time
 import datetime
+import fcntl
 import logging
+import multiprocessing
 import sys
+import threading
 import os
+import asyncio
+import json
 import numpy as np
+import pandas as pd
+from typing import List, Optional
+from pydantic import BaseModel
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Configure logging to print to stdout
 logging.basicConfig(
@@ -27,6 +47,45 @@ DEFAULT_WINDOW = int(os.getenv("WINDOW"))
 DEFAULT_NUM_STD = float(os.getenv("NUM_STD"))
 MAINTENANCE_STATUS = os.getenv("MAINTENANCE_STATUS")
 DEPLOY_TYPE = os.getenv("DEPLOY_TYPE")
+BATCH_CHUNK_SIZE = int(os.getenv("BATCH_CHUNK_SIZE", "100"))
+EXECUTION_MODE = os.getenv("EXECUTION_MODE", "thread")
+PROCESS_WORKERS = int(os.getenv("PROCESS_WORKERS", str(os.cpu_count() or 1)))
+# fork would copy the event loop, the download threads and any lock they hold into every worker
+PROCESS_START_METHOD = os.getenv("PROCESS_START_METHOD", "forkserver")
+UVICORN_WORKERS = int(os.getenv("UVICORN_WORKERS", "1"))
+MAX_REQUEST_TICKERS = int(os.getenv("MAX_REQUEST_TICKERS", "1000"))
+SCAN_STREAM_CONCURRENCY = int(os.getenv("SCAN_STREAM_CONCURRENCY", "8"))
+UNIVERSE_PATH = os.getenv("UNIVERSE_PATH", "/app/data/tickers")
+PREWARM_ENABLED = os.getenv("PREWARM_ENABLED", "false").lower() == "true"
+PREWARM_CONCURRENCY = int(os.getenv("PREWARM_CONCURRENCY", "4"))
+PREWARM_DELAY = float(os.getenv("PREWARM_DELAY", "60"))
+NSE_HOLIDAYS = prewarm.parse_holidays(os.getenv("NSE_HOLIDAYS", ""))
+# 07:45 IST is shortly before the signal-check CronJob (30 2 * * 1-5 UTC)
+PREWARM_EXTRA_TIMES = prewarm.parse_times(os.getenv("PREWARM_EXTRA_TIMES", "07:45"))
+# Only the process holding this lock runs the scheduler, so uvicorn workers do not multiply the downloads
+PREWARM_LOCK_PATH = os.getenv("PREWARM_LOCK_PATH", "/tmp/signal-engine-prewarm.lock")
+PROFILE_TOP_FUNCTIONS = int(os.getenv("PROFILE_TOP_FUNCTIONS", "25"))
+process_pool = None
+process_pool_lock = threading.Lock()
+prewarm_scheduler = None
+prewarm_lock_file = None
+
+class BatchItem(BaseModel):
+    tickers: List[str]
+
+class ScanItem(BaseModel):
+    tickers: Optional[List[str]] = None
+
+def read_universe() -> List[str]:
+    """
+    Tickers from the mounted top-stocks ConfigMap (comma separated), or [] when it is not mounted.
+    """
+    if not os.path.exists(UNIVERSE_PATH):
+        logger.warning(f"Universe file {UNIVERSE_PATH} does not exist.")
+        return []
+    with open(UNIVERSE_PATH) as f:
+        tickers_str = f.read().strip()
+    return [ticker.strip() for ticker in tickers_str.split(",") if ticker.strip()]
 
 def convert_bools_to_strings(data):
     if isinstance(data, dict):
@@ -37,13 +96,300 @@ def convert_bools_to_strings(data):
         return str(data)
     return data
 
-signal_engine = FastAPI()
+def json_default(obj):
+    # Only reached for types the encoder does not handle itself
+    if isinstance(obj, (np.bool_, np.integer, np.floating)):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, (pd.Timestamp, datetime.datetime, datetime.date)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def dumps_json(content) -> bytes:
+    """
+    Serializes responses in one pass, including NumPy scalars and arrays, without converting them first.
+    Uses orjson when installed (NaN becomes null) and the standard library otherwise.
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=json_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=json_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+def new_process_pool() -> ProcessPoolExecutor:
+    context = multiprocessing.get_context(PROCESS_START_METHOD)
+    if PROCESS_START_METHOD == "forkserver":
+        # Workers fork from a server that has already imported the indicator code
+        context.set_forkserver_preload(["signal_functions"])
+    return ProcessPoolExecutor(max_workers=PROCESS_WORKERS, mp_context=context)
+
+def replace_broken_pool(broken: ProcessPoolExecutor) -> ProcessPoolExecutor:
+    """
+    Replaces the process pool after a worker died (BrokenProcessPool), unless another request already did.
+    Returns the pool to retry on.
+    """
+    global process_pool
+    with process_pool_lock:
+        if process_pool is broken:
+            logger.warning("Process pool is broken, starting a new one")
+            broken.shutdown(wait=False, cancel_futures=True)
+            process_pool = new_process_pool()
+        return process_pool
+
+def dumps_v4(content) -> bytes:
+    """
+    dumps_json for BharatQuant v4 results, timed as their serialization stage.
+    """
+    with metrics.V4_STAGE_SECONDS.labels("serialization").time():
+        return dumps_json(content)
+
+def acquire_prewarm_lock() -> bool:
+    """
+    Takes PREWARM_LOCK_PATH without blocking. The lock is held until the process exits (or release_prewarm_lock).
+    """
+    global prewarm_lock_file
+    lock_file = open(PREWARM_LOCK_PATH, "w")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        return False
+    prewarm_lock_file = lock_file
+    return True
+
+def release_prewarm_lock() -> None:
+    global prewarm_lock_file
+    if prewarm_lock_file is not None:
+        prewarm_lock_file.close()
+        prewarm_lock_file = None
+
+class NumpyJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return dumps_json(content)
+
+class V4JSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return dumps_v4(content)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global process_pool, prewarm_scheduler
+    if EXECUTION_MODE == "process":
+        logger.info(f"Starting process pool with {PROCESS_WORKERS} workers")
+        process_pool = new_process_pool()
+        # Pre-warm every worker so the first requests do not pay for process start-up and imports
+        loop = asyncio.get_running_loop()
+        pids = await asyncio.gather(*[loop.run_in_executor(process_pool, sf.warm_worker) for _ in range(PROCESS_WORKERS)])
+        logger.info(f"Process pool ready. Worker pids: {sorted(set(pids))}")
+    prewarm_task = None
+    if PREWARM_ENABLED and not acquire_prewarm_lock():
+        logger.info(f"Pre-warm scheduler runs in another process ({PREWARM_LOCK_PATH} is locked)")
+    elif PREWARM_ENABLED:
+        prewarm_scheduler = prewarm.PrewarmScheduler(
+            read_universe, prewarm_frames, prewarm_v4,
+            concurrency=PREWARM_CONCURRENCY, chunk_size=BATCH_CHUNK_SIZE,
+            delay_seconds=PREWARM_DELAY, holidays=NSE_HOLIDAYS, extra_times=PREWARM_EXTRA_TIMES
+        )
+        prewarm_task = asyncio.create_task(prewarm_scheduler.run_forever())
+        logger.info(f"Pre-warm scheduler started with concurrency {PREWARM_CONCURRENCY}")
+    yield
+    if prewarm_task is not None:
+        prewarm_task.cancel()
+        release_prewarm_lock()
+    if process_pool is not None:
+        process_pool.shutdown(cancel_futures=True)
+        process_pool = None
+
+async def fetch_v4_frames(stock_id: str):
+    # Downloads stay in this process (and its frame cache); both timeframes are fetched concurrently
+    return await asyncio.gather(
+        asyncio.to_thread(sf.fetch_ohlcv, stock_id, "1y", "1d"),
+        asyncio.to_thread(sf.fetch_ohlcv, stock_id, "60d", "1h")
+    )
+
+def timed_compute_v4(submitted: float, mode: str, stock_id: str, df_daily, df_hourly):
+    metrics.THREADPOOL_WAIT_SECONDS.labels(mode).observe(time.time() - submitted)
+    return sf.compute_bharatquant_v4(stock_id, df_daily, df_hourly)
+
+async def compute_v4(stock_id: str, df_daily, df_hourly):
+    # In process mode only the CPU-bound stage is shipped to a worker
+    pool = process_pool
+    if pool is not None:
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(pool, timed_compute_v4, time.time(), "process", stock_id, df_daily, df_hourly)
+        except BrokenProcessPool:
+            pool = replace_broken_pool(pool)
+            return await loop.run_in_executor(pool, timed_compute_v4, time.time(), "process", stock_id, df_daily, df_hourly)
+    return await run_in_threadpool(timed_compute_v4, time.time(), "thread", stock_id, df_daily, df_hourly)
+
+NOT_MODIFIED = object()
+
+async def calculate_v4_cached(stock_id: str, params: tuple, if_none_match: str = None):
+    """
+    Returns (return_data, etag). Results are cached per (symbol, parameters, latest daily and hourly bar);
+    etag is None for responses that are not cached. return_data is NOT_MODIFIED when if_none_match
+    already holds the current ETag.
+    """
+    df_daily, df_hourly = await fetch_v4_frames(stock_id)
+    cache_key = None
+    if sf.result_cache is not None:
+        cache_key = sf.result_cache.make_key(stock_id, params, df_daily, df_hourly)
+    if cache_key is None:
+        return await compute_v4(stock_id, df_daily, df_hourly), None
+
+    etag = sf.result_cache.etag(cache_key)
+    if etag_matches(if_none_match, etag):
+        sf.result_cache.record_not_modified()
+        return NOT_MODIFIED, etag
+    return_data = sf.result_cache.get(cache_key)
+    if return_data is None:
+        return_data = await compute_v4(stock_id, df_daily, df_hourly)
+        if return_data is None or "error" in return_data:
+            return return_data, None
+        sf.result_cache.put(cache_key, return_data)
+    return return_data, etag
+
+async def stream_scan(tickers: List[str], params: tuple, event_stream: bool):
+    """
+    Yields one record per ticker as soon as it finishes (not in request order), then a summary record.
+    At most SCAN_STREAM_CONCURRENCY tickers are in flight; pending work is cancelled if the client goes away.
+    With a frame cache, bars are first downloaded in grouped chunks of BATCH_CHUNK_SIZE (one chunk after
+    another), and each ticker starts as soon as its chunk is in the cache.
+    """
+    semaphore = asyncio.Semaphore(SCAN_STREAM_CONCURRENCY)
+    valid = [ticker for ticker in tickers if ticker.endswith(".NS")]
+    chunks = [valid[offset:offset + BATCH_CHUNK_SIZE] for offset in range(0, len(valid), BATCH_CHUNK_SIZE)]
+    prefetched = {}
+    if sf.frame_cache is not None or sf.shared_bars is not None:
+        prefetched = {ticker: asyncio.Event() for ticker in valid}
+
+    async def prefetch_chunks() -> None:
+        for chunk in chunks:
+            try:
+                await asyncio.to_thread(prefetch_v4_frames, chunk)
+            except Exception as e:
+                # Tickers of a failed chunk fall back to their own downloads
+                logger.warning(f"Scan prefetch failed for a chunk of {len(chunk)} tickers: {str(e)}")
+            for ticker in chunk:
+                prefetched[ticker].set()
+
+    async def scan_one(ticker: str) -> dict:
+        if not ticker.endswith(".NS"):
+            return {"ticker": ticker, "error": "Incorrect Stock ID. Stock ID must end with .NS"}
+        if ticker in prefetched:
+            await prefetched[ticker].wait()
+        async with semaphore:
+            try:
+                return_data, _ = await calculate_v4_cached(ticker, params)
+            except Exception as e:
+                logger.error(f"Scan error for {ticker}: {str(e)}")
+                return {"ticker": ticker, "error": f"Failed to process stock data: {str(e)}"}
+        if return_data is None:
+            return {"ticker": ticker, "error": "No data returned from signal calculation"}
+        return {"ticker": ticker, **return_data}
+
+    def encode(record: dict, event: str = None) -> bytes:
+        payload = dumps_v4(record) if event is None else dumps_json(record)
+        if not event_stream:
+            return payload + b"\n"
+        return (f"event: {event}\n".encode() if event else b"") + b"data: " + payload + b"\n\n"
+
+    prefetch_task = asyncio.create_task(prefetch_chunks()) if prefetched else None
+    tasks = [asyncio.create_task(scan_one(ticker)) for ticker in tickers]
+    errors = 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            record = await next_done
+            errors += "error" in record
+            yield encode(record)
+        logger.info(f"Scan completed. Tickers: {len(tickers)}, Errors: {errors}")
+        yield encode({"done": True, "tickers": len(tickers), "errors": errors}, "done")
+    finally:
+        if prefetch_task is not None:
+            prefetch_task.cancel()
+        for task in tasks:
+            task.cancel()
+
+def prefetch_v4_frames(symbols: List[str], ttl_seconds: float = None, refresh: bool = False) -> None:
+    # Grouped downloads for a whole chunk; the per-ticker fetches in prewarm_v4 and stream_scan then hit the frame cache
+    sf.fetch_bars(symbols, "1y", "1d", ttl_seconds, refresh)
+    sf.fetch_bars(symbols, "60d", "1h", ttl_seconds, refresh)
+
+def prewarm_frames(symbols: List[str], ttl_seconds: float = None) -> None:
+    # A pass always replaces frames cached before the bar closed
+    prefetch_v4_frames(symbols, ttl_seconds, refresh=True)
+
+async def prewarm_v4(stock_id: str):
+    return_data, _ = await calculate_v4_cached(stock_id, (DEFAULT_INTERVAL, DEFAULT_PERIOD, DEFAULT_WINDOW, DEFAULT_NUM_STD))
+    return return_data
+
+def api_key_auth(request: Request):
+    api_key = request.headers.get('X-API-Key')
+    expected_key = os.getenv('SF_API_KEY')
+    if not api_key or api_key != expected_key:
+        raise HTTPException(status_code=401, detail="Invalid or missing API Key")
+
+def check_ticker_count(tickers: List[str]) -> None:
+    if len(tickers) > MAX_REQUEST_TICKERS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_REQUEST_TICKERS} tickers per request")
+
+def profile_v4(stock_id: str):
+    # Download and compute in this thread, bypassing every cache and the process pool, so cProfile sees the
+    # whole call including the provider's network time
+    symbol = stock_id.upper()
+    df_daily = sf.download_batch([symbol], "1d", period="1y")[symbol]
+    df_hourly = sf.download_batch([symbol], "1h", period="60d")[symbol]
+    return sf.compute_bharatquant_v4(stock_id, df_daily, df_hourly)
+
+async def calculate_v4_profiled(stock_id: str):
+    """
+    Returns (return_data, profile) for one v4 call that downloads its bars instead of reading the frame
+    caches or the bar store.
+    """
+    return await run_in_threadpool(
+        profiling.profile_call, profile_v4, stock_id,
+        top=PROFILE_TOP_FUNCTIONS, cumulative_of=("download_batch", "compute_bharatquant_v4")
+    )
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as required for If-None-Match
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag.removeprefix("W/") in candidates
+
+signal_engine = FastAPI(lifespan=lifespan, default_response_class=NumpyJSONResponse)
 
 if DEPLOY_TYPE != "default":
     DEPLOY_TYPE = "/"+DEPLOY_TYPE
 
 router = APIRouter()
 
+@signal_engine.middleware("http")
+async def track_requests(request: Request, call_next):
+    metrics.IN_FLIGHT_REQUESTS.inc()
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        metrics.IN_FLIGHT_REQUESTS.dec()
+    route = request.scope.get("route")
+    route_path = route.path if route is not None else "unmatched"
+    metrics.REQUEST_SECONDS.labels(route_path).observe(time.perf_counter() - start)
+    content_length = response.headers.get("content-length")
+    if content_length is not None:
+        metrics.RESPONSE_BYTES.labels(route_path).observe(int(content_length))
+    return response
+
+@signal_engine.get("/metrics")
+def prometheus_metrics():
+    body, content_type = metrics.render()
+    if body is None:
+        return NumpyJSONResponse({"status": "prometheus_client is not installed"}, status_code=503)
+    return Response(body, media_type=content_type)
+
 # Add CORS middleware
 signal_engine.add_middleware(
     CORSMiddleware,
@@ -56,40 +402,127 @@ signal_engine.add_middleware(
 @router.get("/api/health")
 def health_check():
     if MAINTENANCE_STATUS == "on":
-        return JSONResponse({"status": "Maintenance mode is enabled"})
+        return NumpyJSONResponse({"status": "Maintenance mode is enabled"})
     time_stamp = datetime.datetime.now(datetime.UTC)
     logging.info(f"Reached /api/health at {time_stamp}.")
-    return JSONResponse({
+    return NumpyJSONResponse({
             "status": "OK",
             "timestamp": f"{time_stamp}"
     })
 
+@router.get("/api/cache/stats")
+def cache_stats(dep=Depends(api_key_auth)):
+    if sf.frame_cache is None:
+        return NumpyJSONResponse({"status": "Frame cache is disabled"})
+    return NumpyJSONResponse(sf.frame_cache.stats())
+
+@router.get("/api/cache/shared")
+def shared_cache_stats(dep=Depends(api_key_auth)):
+    if sf.shared_bars is None:
+        return NumpyJSONResponse({"status": "Shared bar cache is disabled"})
+    return NumpyJSONResponse(sf.shared_bars.stats())
+
+@router.get("/api/cache/results")
+def result_cache_stats(dep=Depends(api_key_auth)):
+    if sf.result_cache is None:
+        return NumpyJSONResponse({"status": "Result cache is disabled"})
+    return NumpyJSONResponse(sf.result_cache.stats())
+
+@router.get("/api/prewarm/status")
+def prewarm_status(dep=Depends(api_key_auth)):
+    if prewarm_scheduler is None and PREWARM_ENABLED:
+        return NumpyJSONResponse({"status": "Pre-warm scheduler runs in another process", "pid": os.getpid()})
+    if prewarm_scheduler is None:
+        return NumpyJSONResponse({"status": "Pre-warm scheduler is disabled"})
+    return NumpyJSONResponse(prewarm_scheduler.status())
+
+@router.post("/api/batch")
+def get_batch_stock_data(item: BatchItem, dep=Depends(api_key_auth)):
+    if MAINTENANCE_STATUS == "on":
+        logging.info("Maintenance mode is enabled.")
+        return NumpyJSONResponse({"status": "Maintenance mode is enabled"})
+    check_ticker_count(item.tickers)
+    logging.info(f"Triggering signal-engine batch for {len(item.tickers)} stocks")
+    valid_tickers = [ticker for ticker in item.tickers if ticker.endswith(".NS")]
+    errors = {ticker: "Incorrect Stock ID. Stock ID must end with .NS" for ticker in item.tickers if not ticker.endswith(".NS")}
+    if errors:
+        logger.warning(f"Invalid format: {list(errors.keys())}")
+    try:
+        pool = process_pool
+        try:
+            return_data = sf.calculate_bharatquant_v4_batch(logging, valid_tickers, BATCH_CHUNK_SIZE, pool)
+        except BrokenProcessPool:
+            # The frames of the first attempt are still in the frame cache, so the retry only recomputes
+            return_data = sf.calculate_bharatquant_v4_batch(logging, valid_tickers, BATCH_CHUNK_SIZE, replace_broken_pool(pool))
+        return_data["errors"].update(errors)
+        return V4JSONResponse(return_data)
+    except Exception as e:
+        logger.error(f"Error: {str(e)}")
+        return NumpyJSONResponse({"error": f"Failed to process batch: {str(e)}"})
+
+@router.post("/api/scan")
+async def scan_stocks(
+    item: Optional[ScanItem] = None,
+    format: str = "ndjson",
+    interval: str = DEFAULT_INTERVAL,
+    period: int = DEFAULT_PERIOD,
+    window: int = DEFAULT_WINDOW,
+    num_std: float = DEFAULT_NUM_STD,
+    dep=Depends(api_key_auth)
+):
+    if MAINTENANCE_STATUS == "on":
+        logging.info("Maintenance mode is enabled.")
+        return NumpyJSONResponse({"status": "Maintenance mode is enabled"})
+    if format not in ("ndjson", "sse"):
+        return NumpyJSONResponse({"error": "format must be ndjson or sse"})
+    tickers = item.tickers if item is not None and item.tickers else read_universe()
+    if not tickers:
+        return NumpyJSONResponse({"error": "No tickers given and no universe mounted"})
+    tickers = list(dict.fromkeys(tickers))
+    check_ticker_count(tickers)
+    logging.info(f"Triggering signal-engine scan for {len(tickers)} stocks ({format})")
+    return StreamingResponse(
+        stream_scan(tickers, (interval, period, window, num_std), format == "sse"),
+        media_type="text/event-stream" if format == "sse" else "application/x-ndjson"
+    )
+
 @router.get("/api/{stock_id}")
-def get_stock_data(
+async def get_stock_data(
+    request: Request,
     stock_id: str,
     interval: str = DEFAULT_INTERVAL,
     period: int = DEFAULT_PERIOD,
     window: int = DEFAULT_WINDOW,
-    num_std: float = DEFAULT_NUM_STD
+    num_std: float = DEFAULT_NUM_STD,
+    profile: bool = False
 ):
     if MAINTENANCE_STATUS == "on":
         logging.info("Maintenance mode is enabled.")
-        return JSONResponse({"status": "Maintenance mode is enabled"})
+        return NumpyJSONResponse({"status": "Maintenance mode is enabled"})
+    if profile:
+        api_key_auth(request)
     logging.info(f"Triggering signal-engine for {stock_id}")
     logging.info(f"Strategy Values: interval: {interval}, period: {period}, window: {window}, num_std: {num_std}")
     if stock_id.endswith(".NS"):
         try:
-            return_data = sf.calculate_final_signal(logging,stock_id,interval,period,window,num_std)
+            if profile:
+                return_data, profile_data = await calculate_v4_profiled(stock_id)
+                return NumpyJSONResponse({"result": return_data, "profile": profile_data})
+            return_data, etag = await calculate_v4_cached(stock_id, (interval, period, window, num_std), request.headers.get("if-none-match"))
+            if return_data is NOT_MODIFIED:
+                return Response(status_code=304, headers={"ETag": etag})
             if return_data is None:
                 logger.error("Return data is None")
-                return JSONResponse({"error": "No data returned from signal calculation"})
-            return JSONResponse(return_data)
+                return NumpyJSONResponse({"error": "No data returned from signal calculation"})
+            if etag is not None:
+                return V4JSONResponse(return_data, headers={"ETag": etag})
+            return V4JSONResponse(return_data)
         except Exception as e:
             logger.error(f"Error: {str(e)}")
-            return JSONResponse({"error": f"Failed to process stock data: {str(e)}"})
+            return NumpyJSONResponse({"error": f"Failed to process stock data: {str(e)}"})
     else:
         logger.warning(f"Invalid format: {stock_id}")
-        return JSONResponse({"error": "Incorrect Stock ID. Stock ID must end with .NS"})
+        return NumpyJSONResponse({"error": "Incorrect Stock ID. Stock ID must end with .NS"})
     
 @router.get("/api/{stock_id}/{option}")
 def get_stock_data(
@@ -102,7 +535,7 @@ def get_stock_data(
 ):
     if MAINTENANCE_STATUS == "on":
         logging.info("Maintenance mode is enabled.")
-        return JSONResponse({"status": "Maintenance mode is enabled"})
+        return NumpyJSONResponse({"status": "Maintenance mode is enabled"})
     logging.info("Triggering signal-engine for "+stock_id)
     logging.info(f"Strategy Values: interval: {interval}, period: {period}, window: {window}, num_std: {num_std}")
     if stock_id.endswith(".NS"):
@@ -111,14 +544,14 @@ def get_stock_data(
             return_data = convert_bools_to_strings(return_data)
             if return_data is None:
                 logger.error("Return data is None")
-                return JSONResponse({"error": "No data returned from signal calculation"})
-            return JSONResponse(return_data)
+                return NumpyJSONResponse({"error": "No data returned from signal calculation"})
+            return NumpyJSONResponse(return_data)
         except Exception as e:
             logger.error(f"Error: {str(e)}")
-            return JSONResponse({"error": f"Failed to process stock data: {str(e)}"})
+            return NumpyJSONResponse({"error": f"Failed to process stock data: {str(e)}"})
     else:
         logger.warning(f"Invalid format: {stock_id}")
-        return JSONResponse({"error": "Incorrect Stock ID. Stock ID must end with .NS"})
+        return NumpyJSONResponse({"error": "Incorrect Stock ID. Stock ID must end with .NS"})
 
 if DEPLOY_TYPE != "default":
     signal_engine.include_router(router,prefix=DEPLOY_TYPE)
@@ -126,4 +559,4 @@ else:
     signal_engine.include_router(router)
 if __name__ == "__main__":
     logger.info("Starting up signal-engine server")
-    uvicorn.run("signal_engine:signal_engine", host="0.0.0.0", port=8000, log_level="info")
+    uvicorn.run("signal_engine:signal_engine", host="0.0.0.0", port=8000, log_level="info", workers=UVICORN_WORKERS)
@@ -0,0 +1,119 @@
+"""
+Compact array-backed bars for a whole universe at one interval.
+
+A BarPanel is the input container of the panel engine (see panel_indicators.compute_panel): OHLC as
+contiguous float32 arrays and Volume as float64, each shaped (bars x symbols), on a single int64 timestamp
+array shared by every symbol. Symbols without a bar at some timestamp hold NaN there. Volume stays float64
+because float32 is exact only up to 2**24 shares, and CMF weights every bar by its volume.
+
+Panels are built from bars already fetched for one indicator pass; the frame caches keep per-ticker
+frames, since the v4 stages in signal_functions take DataFrames.
+"""
+import numpy as np
+import pandas as pd
+
+COLUMNS = ('Open', 'High', 'Low', 'Close', 'Volume')
+PRICE_COLUMNS = COLUMNS[:4]
+
+class BarPanel:
+    def __init__(self, symbols, timestamps, prices, volume, tz=None, index_name=None):
+        """
+        `timestamps` are int64 nanoseconds since the epoch (UTC for tz-aware bars), sorted ascending.
+        `prices` is shaped (len(PRICE_COLUMNS), bars, symbols) and `volume` (bars, symbols).
+        """
+        self.symbols = list(symbols)
+        self.timestamps = timestamps
+        self.prices = prices
+        self.volume = volume
+        self.tz = tz
+        self.index_name = index_name
+        self._positions = {symbol: j for j, symbol in enumerate(self.symbols)}
+        self._gapped = None
+
+    @classmethod
+    def from_frames(cls, frames, symbols=None, dtype=np.float32):
+        """
+        Builds a panel from {symbol: frame} with flat OHLCV columns, as returned by the market data
+        providers. The shared timestamps are the union of every frame's index. `dtype` applies to the prices.
+        """
+        symbols = list(frames) if symbols is None else list(symbols)
+        indexes = {}
+        tz = None
+        index_name = None
+        for symbol in symbols:
+            frame = frames[symbol]
+            if frame is None or frame.empty:
+                continue
+            index = pd.DatetimeIndex(frame.index)
+            tz = tz or index.tz
+            index_name = index_name or index.name
+            # pandas 2 indexes may be in us or s resolution; the shared array is always ns
+            indexes[symbol] = index.as_unit('ns').asi8
+        timestamps = np.unique(np.concatenate(list(indexes.values()))) if indexes else np.empty(0, dtype=np.int64)
+        prices = np.full((len(PRICE_COLUMNS), len(timestamps), len(symbols)), np.nan, dtype=dtype)
+        volume = np.full((len(timestamps), len(symbols)), np.nan)
+        for j, symbol in enumerate(symbols):
+            if symbol not in indexes:
+                continue
+            rows = np.searchsorted(timestamps, indexes[symbol])
+            frame = frames[symbol]
+            for i, column in enumerate(PRICE_COLUMNS):
+                prices[i, rows, j] = frame[column].to_numpy(dtype=np.float64)
+            volume[rows, j] = frame['Volume'].to_numpy(dtype=np.float64)
+        return cls(symbols, timestamps, prices, volume, tz, index_name)
+
+    @property
+    def nbytes(self) -> int:
+        return self.prices.nbytes + self.volume.nbytes + self.timestamps.nbytes
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def index(self) -> pd.DatetimeIndex:
+        index = pd.DatetimeIndex(self.timestamps.view('datetime64[ns]'), name=self.index_name)
+        if self.tz is None:
+            return index
+        return index.tz_localize('UTC').tz_convert(self.tz)
+
+    def present(self):
+        """
+        (bars x symbols) mask of the bars each symbol actually has.
+        """
+        return ~(np.isnan(self.prices).all(axis=0) & np.isnan(self.volume))
+
+    def column(self, name: str, dtype=np.float64):
+        """
+        One column as a (bars x symbols) array in the layout of panel_indicators.stack_panel: each symbol's
+        own bars right-aligned on the last row, so a symbol missing a bar in the middle of the shared
+        timestamps is computed exactly as its per-ticker frame would be. When no symbol has gaps and `dtype`
+        is the storage dtype, this is a read-only view of the panel rather than a copy.
+        """
+        values = self.volume if name == 'Volume' else self.prices[PRICE_COLUMNS.index(name)]
+        if self._gapped is None:
+            present = self.present()
+            rows = len(self.timestamps)
+            counts = present.sum(axis=0)
+            first = np.where(counts > 0, np.argmax(present, axis=0), rows)
+            # Symbols whose bars are not one contiguous run ending at the latest timestamp
+            gapped = np.flatnonzero((counts > 0) & (first + counts != rows))
+            self._gapped = {int(j): present[:, j] for j in gapped}
+        if not self._gapped and values.dtype == np.dtype(dtype):
+            view = values.view()
+            view.flags.writeable = False
+            return view
+        out = values.astype(dtype)
+        for j, mask in self._gapped.items():
+            bars = out[mask, j]
+            out[:, j] = np.nan
+            out[len(out) - len(bars):, j] = bars
+        return out
+
+    def frame(self, symbol: str) -> pd.DataFrame:
+        """
+        The bars of one symbol as a float64 DataFrame, for the per-ticker functions in signal_functions.
+        """
+        j = self._positions[symbol]
+        mask = ~(np.isnan(self.prices[:, :, j]).all(axis=0) & np.isnan(self.volume[:, j]))
+        data = {column: self.prices[i, mask, j].astype(np.float64) for i, column in enumerate(PRICE_COLUMNS)}
+        data['Volume'] = self.volume[mask, j]
+        return pd.DataFrame(data, index=self.index()[mask])
@@ -0,0 +1,199 @@
+import os
+import fcntl
+import time
+import logging
+from contextlib import contextmanager, ExitStack
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+PERIOD_UNITS = {"d": 1, "wk": 7, "mo": 30, "y": 365}
+# Stores written before coverage was recorded fall back to their first bar, which can trail the start of
+# the requested period by weekends and exchange holidays
+COVERAGE_SLACK = pd.Timedelta(days=7)
+
+def period_to_timedelta(period: str) -> pd.Timedelta:
+    """
+    Converts a yfinance style period ("60d", "1y", "3mo") into a Timedelta.
+    """
+    for unit in sorted(PERIOD_UNITS, key=len, reverse=True):
+        if period.endswith(unit) and period[:-len(unit)].isdigit():
+            return pd.Timedelta(days=int(period[:-len(unit)]) * PERIOD_UNITS[unit])
+    raise ValueError(f"Unsupported period: {period}")
+
+class BarStore:
+    """
+    On-disk Parquet store of OHLCV bars keyed by (symbol, interval).
+
+    Layout: <root>/<interval>/<symbol>/base.parquet plus small delta-<ns>.parquet files written
+    by incremental appends. Deltas are merged back into the base file by compact().
+    """
+
+    def __init__(self, root: str, compact_threshold: int = 8, retention_days: int = 400):
+        self.root = root
+        self.compact_threshold = compact_threshold
+        self.retention = pd.Timedelta(days=retention_days)
+        os.makedirs(root, exist_ok=True)
+
+    def _dir(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.root, interval, symbol.upper())
+
+    @contextmanager
+    def lock(self, symbol: str, interval: str):
+        """
+        Exclusive per-symbol lock shared by every thread and process using the same root.
+        """
+        path = self._dir(symbol, interval)
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, ".lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _parts(self, symbol: str, interval: str):
+        path = self._dir(symbol, interval)
+        if not os.path.isdir(path):
+            return []
+        deltas = sorted(name for name in os.listdir(path) if name.startswith("delta-") and name.endswith(".parquet"))
+        parts = ["base.parquet"] if os.path.exists(os.path.join(path, "base.parquet")) else []
+        return [os.path.join(path, name) for name in parts + deltas]
+
+    def covered_from(self, symbol: str, interval: str):
+        """
+        Earliest time from which the stored bars are complete (every full download of a period moves
+        it back to the start of that period), or None when it was never recorded.
+        """
+        try:
+            with open(os.path.join(self._dir(symbol, interval), "covered_from")) as f:
+                return pd.Timestamp(f.read().strip())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _set_covered_from(self, symbol: str, interval: str, ts: pd.Timestamp) -> None:
+        path = os.path.join(self._dir(symbol, interval), "covered_from")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(f"{path}.tmp", "w") as f:
+            f.write(ts.isoformat())
+        os.replace(f"{path}.tmp", path)
+
+    def _write(self, df: pd.DataFrame, path: str) -> None:
+        # Write to a temp file and rename so readers never see a partial file
+        tmp_path = f"{path}.tmp"
+        df.to_parquet(tmp_path)
+        os.replace(tmp_path, path)
+
+    def read(self, symbol: str, interval: str) -> pd.DataFrame:
+        frames = [pd.read_parquet(path) for path in self._parts(symbol, interval)]
+        if not frames:
+            return pd.DataFrame()
+        df = pd.concat(frames) if len(frames) > 1 else frames[0]
+        df = df[~df.index.duplicated(keep="last")]
+        return df.sort_index()
+
+    def append(self, symbol: str, interval: str, df: pd.DataFrame) -> None:
+        """
+        Appends new bars as a delta file. Bars overlapping stored timestamps replace them on read.
+        """
+        if df.empty:
+            return
+        if isinstance(df.columns, pd.MultiIndex):
+            df = df.copy()
+            df.columns = df.columns.get_level_values(0)
+        path = self._dir(symbol, interval)
+        os.makedirs(path, exist_ok=True)
+        if not os.path.exists(os.path.join(path, "base.parquet")):
+            self._write(df, os.path.join(path, "base.parquet"))
+            return
+        self._write(df, os.path.join(path, f"delta-{time.time_ns()}.parquet"))
+        if len(self._parts(symbol, interval)) - 1 >= self.compact_threshold:
+            self.compact(symbol, interval)
+
+    def compact(self, symbol: str, interval: str) -> None:
+        """
+        Merges delta files into the base file and drops bars older than the retention window.
+        Callers must hold the symbol lock.
+        """
+        parts = self._parts(symbol, interval)
+        if not parts:
+            return
+        df = self.read(symbol, interval)
+        if not df.empty:
+            cutoff = df.index[-1] - self.retention
+            df = df[df.index >= cutoff]
+            covered = self.covered_from(symbol, interval)
+            if covered is not None:
+                cutoff = cutoff.tz_localize("UTC") if cutoff.tzinfo is None else cutoff
+                if covered < cutoff:
+                    self._set_covered_from(symbol, interval, cutoff)
+        self._write(df, os.path.join(self._dir(symbol, interval), "base.parquet"))
+        for path in parts:
+            if not path.endswith("base.parquet"):
+                os.remove(path)
+
+    def compact_all(self) -> None:
+        for interval in os.listdir(self.root):
+            interval_dir = os.path.join(self.root, interval)
+            if not os.path.isdir(interval_dir):
+                continue
+            for symbol in os.listdir(interval_dir):
+                with self.lock(symbol, interval):
+                    self.compact(symbol, interval)
+
+    def get_bars(self, symbols, period: str, interval: str, download):
+        """
+        Returns {symbol: frame} covering `period`, downloading only bars newer than the last stored one.
+        Symbols whose stored history does not reach back to the start of `period` are downloaded in full.
+
+        `download(symbols, interval, period=None, start=None)` must return {symbol: frame}.
+        The last stored bar is re-downloaded since it may still have been forming when it was stored.
+        """
+        span = period_to_timedelta(period)
+        symbols = sorted(set(symbols))
+        with ExitStack() as stack:
+            # Locks are taken in sorted order so concurrent batches cannot deadlock
+            for symbol in symbols:
+                stack.enter_context(self.lock(symbol, interval))
+
+            stored = {symbol: self.read(symbol, interval) for symbol in symbols}
+            now = pd.Timestamp.now(tz="UTC")
+            full_fetch = []
+            incremental = {}
+            for symbol, df in stored.items():
+                if df.empty:
+                    full_fetch.append(symbol)
+                    continue
+                last_ts = df.index[-1]
+                if last_ts.tzinfo is None:
+                    last_ts = last_ts.tz_localize("UTC")
+                covered = self.covered_from(symbol, interval)
+                if covered is None:
+                    first_ts = df.index[0]
+                    covered = (first_ts.tz_localize("UTC") if first_ts.tzinfo is None else first_ts) - COVERAGE_SLACK
+                if now - last_ts > span or covered > now - span:
+                    full_fetch.append(symbol)
+                else:
+                    incremental.setdefault(last_ts, []).append(symbol)
+
+            if full_fetch:
+                logger.info(f"Bar store miss for {len(full_fetch)} symbols ({interval}), downloading {period}")
+                for symbol, df in download(full_fetch, interval, period=period).items():
+                    self.append(symbol, interval, df)
+                    covered = self.covered_from(symbol, interval)
+                    if covered is None or covered > now - span:
+                        self._set_covered_from(symbol, interval, now - span)
+            if incremental:
+                # One grouped download starting at the oldest last-bar covers every stale symbol
+                start = min(incremental)
+                stale = [symbol for group in incremental.values() for symbol in group]
+                for symbol, df in download(stale, interval, start=start).items():
+                    self.append(symbol, interval, df)
+
+            frames = {}
+            for symbol in symbols:
+                df = self.read(symbol, interval)
+                if not df.empty:
+                    df = df[df.index >= df.index[-1] - span]
+                frames[symbol] = df
+            return frames
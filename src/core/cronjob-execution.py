@@ -8,6 +8,9 @@ import time
 import sys
 from typing import List, Tuple
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Configure logging
 logging.basicConfig(
@@ -24,9 +27,25 @@ try:
     SIGNAL_ENGINE_URL = os.getenv("SIGNAL_ENGINE")
     MARKET_INTEL_ENGINE_URL = os.getenv("MARKET_INTEL_ENGINE")
     EVENT_DISPATCHER_URL = os.getenv("EVENT_DISPATCHER")
+    SF_API_KEY = os.getenv("SF_API_KEY")
 except Exception as e:
     logger.error(f"Error loading environment variables: {str(e)}")
 
+SCAN_CONCURRENCY = int(os.getenv("SCAN_CONCURRENCY", "8"))
+SCAN_TIMEOUT = float(os.getenv("SCAN_TIMEOUT", "60"))
+SCAN_RETRIES = int(os.getenv("SCAN_RETRIES", "3"))
+SCAN_MODE = os.getenv("SCAN_MODE", "parallel")
+# Market-intel chunking: 0 sends every candidate in one prompt
+MIE_CHUNK_SIZE = int(os.getenv("MIE_CHUNK_SIZE", "0"))
+MIE_CONCURRENCY = int(os.getenv("MIE_CONCURRENCY", "4"))
+MIE_RETRIES = int(os.getenv("MIE_RETRIES", "3"))
+# Indexed Job sharding: JOB_COMPLETION_INDEX is set by Kubernetes, SHARD_COUNT matches the Job's completions
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", "1"))
+SHARD_INDEX = int(os.getenv("JOB_COMPLETION_INDEX", "0"))
+SHARD_DIR = os.getenv("SHARD_DIR", "/app/shards")
+SHARD_RUN_ID = os.getenv("SHARD_RUN_ID", "local")
+SHARD_WAIT_TIMEOUT = float(os.getenv("SHARD_WAIT_TIMEOUT", "1800"))
+
 
 def save_list_to_file(stock_list: List[str], filename: str) -> None:
     try:
@@ -64,10 +83,14 @@ def get_top_500_stocks_from_mount() -> List[str]:
         logger.error(f"Error reading stocks from mount: {str(e)}")
         return []
 
-def fetch_openai_analysis(url, prompt, retries=3, timeout=240):
+def fetch_openai_analysis(url, prompt, retries=3, timeout=240, tickers=None):
+    payload = {"prompt": prompt}
+    if tickers:
+        # Lets market-intel answer from today's cached per-ticker verdicts
+        payload["tickers"] = tickers
     for attempt in range(retries):
         try:
-            response = requests.post(url,json={"prompt":prompt},timeout=timeout)
+            response = requests.post(url,json=payload,timeout=timeout)
             parsed_response = response.json()
             keys = list(parsed_response.keys())
             if "mie_analysis" not in keys:
@@ -105,66 +128,271 @@ def identify_stocks():
             ticker_list.append(ticker)
             final_buy_list.append([ticker, signals, strength, reasons])
 
-def identify_v4_stocks():
+def create_scan_session(pool_size: int, retries: int) -> requests.Session:
+    # Keep-alive pool sized to the concurrency limit; the Service spreads the connections across replicas
+    retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=[502, 503, 504], allowed_methods=["GET"])
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def fetch_v4_signal(session: requests.Session, ticker: str) -> dict:
+    res = session.get(f"{SIGNAL_ENGINE_URL}/api/{ticker}", timeout=SCAN_TIMEOUT)
+    return res.json()
+
+def is_v4_buy(ticker: str, res: dict) -> bool:
+    # v4.3 Optimization: Score >= 6 for high-probability swing
+    if res.get('buy') and res.get('score', 0) >= 6:
+        logger.info(f"V4 BUY DETECTED: {ticker} | Score: {res['score']}")
+        return True
+    return False
+
+def scan_v4_parallel(tickers: List[str]) -> Tuple[dict, dict]:
+    """
+    One /api/{ticker} request per ticker on a thread pool. Returns ({index: result} for BUY
+    candidates, {index: ticker} for failures).
+    """
+    logger.info(f"Scanning {len(tickers)} tickers with concurrency {SCAN_CONCURRENCY}")
+    session = create_scan_session(SCAN_CONCURRENCY, SCAN_RETRIES)
+    results = {}
+    errors = {}
+    with ThreadPoolExecutor(max_workers=SCAN_CONCURRENCY) as executor:
+        futures = {executor.submit(fetch_v4_signal, session, ticker): i for i, ticker in enumerate(tickers)}
+        for completed, future in enumerate(as_completed(futures), start=1):
+            i = futures[future]
+            ticker = tickers[i]
+            try:
+                res = future.result()
+                if is_v4_buy(ticker, res):
+                    results[i] = res
+            except Exception as e:
+                logger.error(f"Error in v4 analysis for {ticker}: {str(e)}")
+                errors[i] = ticker
+
+            if completed % 50 == 0:
+                logger.info(f"V4 Scan Progress: {completed}/{len(tickers)}")
+    session.close()
+    return results, errors
+
+def scan_v4_streamed(tickers: List[str]) -> Tuple[dict, dict]:
+    """
+    Streaming /api/scan requests for the whole universe. Records arrive as each ticker finishes,
+    so BUY candidates are picked up without waiting for the slowest symbols. When a stream breaks off,
+    the tickers it did not return yet are requested again, up to SCAN_RETRIES more times. Same return
+    shape as scan_v4_parallel; tickers still missing after the last attempt are reported as errors.
+    """
+    logger.info(f"Scanning {len(tickers)} tickers via streaming scan")
+    position = {ticker: i for i, ticker in enumerate(tickers)}
+    results = {}
+    errors = {}
+    seen = set()
+    session = create_scan_session(1, SCAN_RETRIES)
+    try:
+        for attempt in range(SCAN_RETRIES + 1):
+            pending = [ticker for ticker in tickers if ticker not in seen]
+            if not pending:
+                break
+            if attempt > 0:
+                logger.warning(f"Retrying streaming scan for {len(pending)} unseen tickers (attempt {attempt + 1})")
+                time.sleep(2 ** attempt)
+            try:
+                with session.post(f"{SIGNAL_ENGINE_URL}/api/scan", json={"tickers": pending}, headers={"X-API-Key": SF_API_KEY},
+                                  stream=True, timeout=SCAN_TIMEOUT) as res:
+                    res.raise_for_status()
+                    for line in res.iter_lines():
+                        if not line:
+                            continue
+                        record = json.loads(line)
+                        ticker = record.get("ticker")
+                        if ticker not in position or ticker in seen:
+                            continue
+                        seen.add(ticker)
+                        i = position[ticker]
+                        if "error" in record:
+                            logger.error(f"Error in v4 analysis for {ticker}: {record['error']}")
+                            errors[i] = ticker
+                        elif is_v4_buy(ticker, record):
+                            results[i] = record
+                        if len(seen) % 50 == 0:
+                            logger.info(f"V4 Scan Progress: {len(seen)}/{len(tickers)}")
+            except Exception as e:
+                logger.error(f"Streaming scan failed after {len(seen)} tickers: {str(e)}")
+    finally:
+        session.close()
+    for ticker, i in position.items():
+        if ticker not in seen:
+            errors[i] = ticker
+    return results, errors
+
+def identify_v4_stocks(tickers: List[str] = None):
     logger.info("Initiating BharatQuant v4 Scanning...")
     final_buy_list = []
     error_list = []
     ticker_list = []
     
-    # Fetch tickers from Mount (ConfigMap)
-    tickers = get_top_500_stocks_from_mount()
+    # Fetch tickers from Mount (ConfigMap) unless a shard of it is given
+    if tickers is None:
+        tickers = get_top_500_stocks_from_mount()
     
     if not tickers:
         logger.error("No tickers found to scan.")
         return [[], [], []]
 
-    for i, ticker in enumerate(tickers):
-        try:
-            # v4.3 Optimization: Score >= 6 for high-probability swing
-            res = requests.get(f"{SIGNAL_ENGINE_URL}/api/{ticker}")
-            res = res.json()
-            if res.get('buy') and res.get('score', 0) >= 6:
-                logger.info(f"V4 BUY DETECTED: {ticker} | Score: {res['score']}")
-                ticker_list.append(ticker)
-                # Format to match identifying_stocks output: [ticker, signals, strength, reasons]
-                final_buy_list.append([
-                    ticker, 
-                    res.get('signals', ''), 
-                    res.get('strength', ''), 
-                    res.get('reason', '')
-                ])
-                
-            if (i + 1) % 50 == 0:
-                logger.info(f"V4 Scan Progress: {i + 1}/{len(tickers)}")
-                
-        except Exception as e:
-            logger.error(f"Error in v4 analysis for {ticker}: {str(e)}")
-            error_list.append(ticker)
-            continue
+    if SCAN_MODE == "stream":
+        results, errors = scan_v4_streamed(tickers)
+    else:
+        results, errors = scan_v4_parallel(tickers)
+
+    # Keep the universe order so the output does not depend on completion order
+    for i in sorted(results):
+        res = results[i]
+        ticker_list.append(tickers[i])
+        # Format to match identifying_stocks output: [ticker, signals, strength, reasons]
+        final_buy_list.append([
+            tickers[i],
+            res.get('signals', ''),
+            res.get('strength', ''),
+            res.get('reason', '')
+        ])
+    error_list = [errors[i] for i in sorted(errors)]
 
     return [final_buy_list, error_list, ticker_list]
 
+def fetch_chunked_analysis(prompt_template: str, ticker_list) -> dict:
+    """
+    Splits the candidates into chunks of MIE_CHUNK_SIZE, analyses up to MIE_CONCURRENCY chunks at a time and
+    merges their results in candidate order. Each round retries only the chunks that failed; after
+    MIE_RETRIES rounds the successful chunks are returned, unless none succeeded.
+    """
+    chunks = [ticker_list[start:start + MIE_CHUNK_SIZE] for start in range(0, len(ticker_list), MIE_CHUNK_SIZE)]
+    analyses = {}
+    pending = list(range(len(chunks)))
+    for attempt in range(MIE_RETRIES):
+        logger.info(f"Market-intel round {attempt + 1}: {len(pending)} of {len(chunks)} chunks")
+        failed = []
+        with ThreadPoolExecutor(max_workers=MIE_CONCURRENCY) as executor:
+            futures = {
+                executor.submit(fetch_openai_analysis, f"{MARKET_INTEL_ENGINE_URL}/chat",
+                                prompt_template.replace("__TICKER_LIST__", str(chunks[i])), 1,
+                                tickers=[row[0] for row in chunks[i]]): i
+                for i in pending
+            }
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    analyses[i] = future.result()
+                except Exception as e:
+                    logger.error(f"Market-intel chunk {i} failed on round {attempt + 1}: {str(e)}")
+                    failed.append(i)
+        pending = sorted(failed)
+        if not pending:
+            break
+
+    if not analyses:
+        raise Exception(f"Analysis failed for all {len(chunks)} chunks")
+    if pending:
+        logger.error(f"Market-intel chunks {pending} failed after {MIE_RETRIES} rounds; continuing without them")
+    results = []
+    for i in sorted(analyses):
+        results.extend(analyses[i]["mie_analysis"].get("results", []))
+    return {"mie_analysis": {"status": "success", "results": results}}
+
 def perform_market_sentiment_analysis(ticker_list):
     prompt=""
     with open("/app/market_analysis_prompt.txt") as file:
-        prompt = file.read()
-        prompt = prompt.replace("__TICKER_LIST__",str(ticker_list))
-    file.close()
-    mie_analysis = fetch_openai_analysis(f"{MARKET_INTEL_ENGINE_URL}/chat",prompt)
+        prompt_template = file.read()
+    if MIE_CHUNK_SIZE > 0 and len(ticker_list) > MIE_CHUNK_SIZE:
+        mie_analysis = fetch_chunked_analysis(prompt_template, ticker_list)
+    else:
+        prompt = prompt_template.replace("__TICKER_LIST__",str(ticker_list))
+        mie_analysis = fetch_openai_analysis(f"{MARKET_INTEL_ENGINE_URL}/chat",prompt,tickers=[row[0] for row in ticker_list])
     final_list=[]
     for i in range(len(mie_analysis["mie_analysis"]["results"])):
         if mie_analysis["mie_analysis"]["results"][i]["buy_rating"] >=5:
             final_list.append(mie_analysis["mie_analysis"]["results"][i])
     return final_list
 
-if __name__ == "__main__":
-    # 1. Fetch BharatQuant v4 Signals (Local Engine) - ONLY V4
-    logger.info("Starting BharatQuant v4 Signal Identification...")
-    v4_results = identify_v4_stocks()
-    v4_payload = v4_results[0]
-    unique_tickers = v4_results[2]
-    
-    logger.info(f"Total Unique Stocks identified by V4: {len(unique_tickers)}")
+def shard_path(index: int) -> str:
+    return os.path.join(SHARD_DIR, SHARD_RUN_ID, f"shard-{index}.json")
+
+def done_marker_path() -> str:
+    return os.path.join(SHARD_DIR, SHARD_RUN_ID, "done")
+
+def write_shard(index: int, shard: dict) -> None:
+    path = shard_path(index)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(shard, f)
+    # Readers only ever see complete shard files
+    os.replace(tmp_path, path)
+
+def wait_for_shards(count: int, timeout: float) -> List[dict]:
+    """
+    Waits until every shard of this run has been written and returns them, or returns None when some are
+    still missing after the timeout.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        missing = [index for index in range(count) if not os.path.exists(shard_path(index))]
+        if not missing:
+            break
+        if time.monotonic() >= deadline:
+            logger.error(f"Timed out waiting for shards {missing} in {os.path.dirname(shard_path(0))}")
+            return None
+        time.sleep(5)
+    shards = []
+    for index in range(count):
+        if os.path.exists(shard_path(index)):
+            with open(shard_path(index)) as f:
+                shards.append(json.load(f))
+    return shards
+
+def run_v4_shard(universe: List[str]) -> None:
+    """
+    Scans this pod's slice of the universe (every SHARD_COUNT-th ticker starting at SHARD_INDEX) and writes it
+    to the shared shard directory. Index 0 then acts as the reducer: it merges every shard and runs the
+    market-intel and email stages once for the whole universe. The reducer exits non-zero without reporting
+    when shards are missing, and marks the run done after reporting so a restarted pod does not report twice.
+    """
+    if os.path.exists(done_marker_path()):
+        logger.info(f"Run {SHARD_RUN_ID} was already reported; nothing to do for shard {SHARD_INDEX}")
+        return
+    positions = range(SHARD_INDEX, len(universe), SHARD_COUNT)
+    shard_tickers = [universe[position] for position in positions]
+    logger.info(f"Shard {SHARD_INDEX}/{SHARD_COUNT} of run {SHARD_RUN_ID}: {len(shard_tickers)} of {len(universe)} tickers")
+    buy_list, error_list, _ = identify_v4_stocks(shard_tickers) if shard_tickers else [[], [], []]
+    position_of = {universe[position]: position for position in positions}
+    write_shard(SHARD_INDEX, {
+        "index": SHARD_INDEX,
+        "tickers": len(shard_tickers),
+        "buy_list": [{"position": position_of[row[0]], "row": row} for row in buy_list],
+        "errors": error_list
+    })
+    if SHARD_INDEX != 0:
+        return
+
+    shards = wait_for_shards(SHARD_COUNT, SHARD_WAIT_TIMEOUT)
+    if shards is None:
+        # A partial universe is never reported; the shard files stay so a restarted reducer can still merge them
+        logger.error("Not every shard finished; check that parallelism equals completions and that SHARD_DIR "
+                     "is a volume shared by all pods. No report was sent.")
+        sys.exit(1)
+    rows = sorted((entry for shard in shards for entry in shard["buy_list"]), key=lambda entry: entry["position"])
+    v4_payload = [entry["row"] for entry in rows]
+    errors = [ticker for shard in shards for ticker in shard["errors"]]
+    logger.info(f"Merged {len(shards)} shards: {sum(shard['tickers'] for shard in shards)} tickers scanned, "
+                f"{len(v4_payload)} BUY signals, {len(errors)} errors")
+    report_v4_signals(v4_payload)
+    with open(done_marker_path(), "w") as f:
+        f.write(time.strftime("%Y-%m-%dT%H:%M:%S"))
+    for index in range(SHARD_COUNT):
+        if os.path.exists(shard_path(index)):
+            os.remove(shard_path(index))
+
+def report_v4_signals(v4_payload) -> None:
+    logger.info(f"Total Unique Stocks identified by V4: {len(v4_payload)}")
     
     if len(v4_payload) > 0:
         # 2. Perform AI Sentiment Analysis
@@ -176,4 +404,13 @@ if __name__ == "__main__":
         else:
             logger.info("No stocks passed the AI Sentiment filter (Score >= 5).")
     else:
-        logger.info("No BUY signals detected by BharatQuant v4 engine.")
\ No newline at end of file
+        logger.info("No BUY signals detected by BharatQuant v4 engine.")
+
+if __name__ == "__main__":
+    # 1. Fetch BharatQuant v4 Signals (Local Engine) - ONLY V4
+    logger.info("Starting BharatQuant v4 Signal Identification...")
+    if SHARD_COUNT > 1:
+        run_v4_shard(get_top_500_stocks_from_mount())
+    else:
+        v4_results = identify_v4_stocks()
+        report_v4_signals(v4_results[0])
@@ -1,10 +1,12 @@
 import os
 import pandas as pd
-import yfinance as yf
+import market_data
 import requests
 import logging
 import sys
-from typing import List
+import threading
+from typing import List, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Configure logging
 logging.basicConfig(
@@ -19,6 +21,29 @@ import time
 STOCKFLOW_CONTROLLER_URL = os.getenv("STOCKFLOW_CONTROLLER")
 SF_API_KEY = os.getenv("SF_API_KEY")
 DEPLOY_TYPE = os.getenv("DEPLOY_TYPE", "default")
+DISCOVERY_MODE = os.getenv("DISCOVERY_MODE", "batched")
+DISCOVERY_CHUNK_SIZE = int(os.getenv("DISCOVERY_CHUNK_SIZE", "100"))
+DISCOVERY_CONCURRENCY = int(os.getenv("DISCOVERY_CONCURRENCY", "4"))
+DISCOVERY_RATE_LIMIT = float(os.getenv("DISCOVERY_RATE_LIMIT", "2"))
+TOP_STOCKS_COUNT = 900
+
+class RateLimiter:
+    """
+    Spaces out calls so that at most `rate` start per second across all threads.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.next_time = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        with self.lock:
+            now = time.monotonic()
+            wait = self.next_time - now
+            self.next_time = max(now, self.next_time) + self.interval
+        if wait > 0:
+            time.sleep(wait)
 
 def get_top_500_stocks_by_volume(csv_file_path: str = "EQUITY_L.csv") -> List[str]:
     try:
@@ -40,8 +65,7 @@ def get_top_500_stocks_by_volume(csv_file_path: str = "EQUITY_L.csv") -> List[st
                 if i % 10 == 0 and i > 0:
                     time.sleep(1)
                 
-                ticker = yf.Ticker(symbol)
-                hist = ticker.history(period="1d")
+                hist = market_data.get_provider().download([symbol], "1d", period="1d")[symbol]
                 
                 if not hist.empty and 'Volume' in hist.columns:
                     volume = hist['Volume'].iloc[-1]
@@ -61,7 +85,7 @@ def get_top_500_stocks_by_volume(csv_file_path: str = "EQUITY_L.csv") -> List[st
         
         # Sort by volume descending
         sorted_stocks = sorted(volume_data.items(), key=lambda x: x[1], reverse=True)
-        top_500_stocks = [stock[0] for stock in sorted_stocks[:900]]
+        top_500_stocks = [stock[0] for stock in sorted_stocks[:TOP_STOCKS_COUNT]]
         
         return top_500_stocks
         
@@ -69,6 +93,71 @@ def get_top_500_stocks_by_volume(csv_file_path: str = "EQUITY_L.csv") -> List[st
         logger.error(f"Error in get_top_500_stocks_by_volume: {str(e)}")
         return []
 
+def fetch_chunk_volumes(symbols: List[str], rate_limiter: RateLimiter, retries: int = 2) -> dict:
+    """
+    Downloads the latest daily bar for a chunk of symbols in one request and returns {symbol: volume}.
+    """
+    for attempt in range(retries):
+        rate_limiter.acquire()
+        try:
+            frames = market_data.get_provider().download(symbols, "1d", period="1d")
+            break
+        except Exception as e:
+            logger.warning(f"Chunk download failed (attempt {attempt + 1}/{retries}) for {symbols[0]}..{symbols[-1]}: {str(e)}")
+    else:
+        return {}
+
+    volumes = {}
+    for symbol, df in frames.items():
+        if df.empty or 'Volume' not in df.columns:
+            continue
+        volume_series = df['Volume'].dropna()
+        if not volume_series.empty and volume_series.iloc[-1] > 0:
+            volumes[symbol] = volume_series.iloc[-1]
+    return volumes
+
+def get_top_stocks_by_volume_batched(csv_file_path: str = "EQUITY_L.csv") -> Tuple[List[str], List[str]]:
+    """
+    Batched discovery: downloads volume in multi-symbol chunks, runs chunks concurrently under a rate limiter.
+    Returns (top stocks by volume, symbols without volume data).
+    """
+    try:
+        if not os.path.exists(csv_file_path):
+            logger.error(f"CSV file not found: {csv_file_path}")
+            return [], []
+
+        logger.info(f"Reading stock symbols from {csv_file_path}")
+        df = pd.read_csv(csv_file_path)
+        symbols = df.iloc[:, 0].tolist()
+        nse_symbols = [f"{symbol}.NS" for symbol in symbols]
+        chunks = [nse_symbols[i:i + DISCOVERY_CHUNK_SIZE] for i in range(0, len(nse_symbols), DISCOVERY_CHUNK_SIZE)]
+
+        logger.info(f"Fetching volume data for {len(nse_symbols)} stocks in {len(chunks)} chunks "
+                    f"(concurrency {DISCOVERY_CONCURRENCY}, {DISCOVERY_RATE_LIMIT} requests/s)...")
+
+        rate_limiter = RateLimiter(DISCOVERY_RATE_LIMIT)
+        volume_data = {}
+        with ThreadPoolExecutor(max_workers=DISCOVERY_CONCURRENCY) as executor:
+            futures = [executor.submit(fetch_chunk_volumes, chunk, rate_limiter) for chunk in chunks]
+            for completed, future in enumerate(as_completed(futures), start=1):
+                try:
+                    volume_data.update(future.result())
+                except Exception as e:
+                    logger.warning(f"Error fetching chunk: {str(e)}")
+                logger.info(f"Processed {completed}/{len(chunks)} chunks")
+
+        failed = [symbol for symbol in nse_symbols if symbol not in volume_data]
+        logger.info(f"Successfully fetched volume data for {len(volume_data)} stocks, {len(failed)} failed")
+        if failed:
+            logger.warning(f"Symbols without volume data: {failed}")
+
+        sorted_stocks = sorted(volume_data.items(), key=lambda x: x[1], reverse=True)
+        return [stock[0] for stock in sorted_stocks[:TOP_STOCKS_COUNT]], failed
+
+    except Exception as e:
+        logger.error(f"Error in get_top_stocks_by_volume_batched: {str(e)}")
+        return [], []
+
 def post_to_controller(tickers: List[str]):
     if not tickers:
         logger.warning("No tickers to post.")
@@ -91,7 +180,10 @@ if __name__ == "__main__":
     # Base path for CSV might vary depending on env
     csv_path = os.getenv("EQUITY_CSV_PATH", "EQUITY_L.csv")
     
-    top_stocks = get_top_500_stocks_by_volume(csv_path)
+    if DISCOVERY_MODE == "batched":
+        top_stocks, _ = get_top_stocks_by_volume_batched(csv_path)
+    else:
+        top_stocks = get_top_500_stocks_by_volume(csv_path)
     if top_stocks:
         post_to_controller(top_stocks)
     else:
@@ -0,0 +1,125 @@
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+class FrameCache:
+    """
+    Bounded in-memory cache of fetched DataFrames with TTL expiry and LRU eviction by memory size.
+
+    Concurrent requests for the same key share one in-flight fetch (single-flight).
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (frame, size, expires_at)
+        self._in_flight = {}  # key -> Future
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def _size_of(frame) -> int:
+        try:
+            return int(frame.memory_usage(deep=True).sum())
+        except AttributeError:
+            return 0
+
+    def _pop(self, key) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def _lookup(self, key, now: float):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[2] <= now:
+            self._pop(key)
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def _store(self, key, frame, ttl_seconds: float = None) -> None:
+        size = self._size_of(frame)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._pop(key)
+        ttl_seconds = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._entries[key] = (frame, size, time.monotonic() + ttl_seconds)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._pop(oldest)
+            self.evictions += 1
+
+    def get_many(self, keys, fetch, ttl_seconds: float = None, refresh: bool = False):
+        """
+        Returns {key: frame}. `fetch(missing_keys)` must return {key: frame} and is called at most once,
+        only for keys that are neither cached nor already being fetched by another thread.
+        Frames are returned as shallow copies so callers can rename columns without touching the cache.
+        `ttl_seconds` overrides the cache's TTL for the frames fetched by this call, and `refresh` fetches
+        every key that is not already in flight, even when it is cached.
+        """
+        results = {}
+        waiting = {}
+        leading = {}
+        with self._lock:
+            now = time.monotonic()
+            for key in dict.fromkeys(keys):
+                frame = None if refresh else self._lookup(key, now)
+                if frame is not None:
+                    self.hits += 1
+                    results[key] = frame
+                elif key in self._in_flight:
+                    self.hits += 1
+                    waiting[key] = self._in_flight[key]
+                else:
+                    self.misses += 1
+                    leading[key] = self._in_flight[key] = Future()
+
+        if leading:
+            try:
+                fetched = fetch(list(leading))
+            except Exception as e:
+                with self._lock:
+                    for key, future in leading.items():
+                        del self._in_flight[key]
+                        future.set_exception(e)
+                raise
+            with self._lock:
+                for key, future in leading.items():
+                    frame = fetched.get(key)
+                    if frame is not None and not frame.empty:
+                        self._store(key, frame, ttl_seconds)
+                    del self._in_flight[key]
+                    future.set_result(frame)
+                    results[key] = frame
+
+        for key, future in waiting.items():
+            results[key] = future.result()
+
+        return {key: (frame.copy(deep=False) if frame is not None else frame) for key, frame in results.items()}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+            }
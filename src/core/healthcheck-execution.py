@@ -1,10 +1,11 @@
 import os
-import os
 import smtplib
 from email.message import EmailMessage
 from email.utils import formataddr
 from datetime import datetime
 import time
+import asyncio
+import httpx
 import requests
 import json
 import logging
@@ -31,34 +32,63 @@ try:
 except Exception as e:
     logger.error(f"Error loading environment variables: {str(e)}")
 
-def check_service_health(url, retries=3, timeout=20):
+HEALTH_PROBE_TIMEOUT = float(os.getenv("HEALTH_PROBE_TIMEOUT", "20"))
+HEALTH_PROBE_RETRIES = int(os.getenv("HEALTH_PROBE_RETRIES", "3"))
+HEALTH_PROBE_DEADLINE = float(os.getenv("HEALTH_PROBE_DEADLINE", "60"))
+
+async def check_service_health(client, url, retries=3, timeout=20):
+    """
+    Probes `url` until it answers {"status": "OK"}. Returns {"healthy", "latency_ms", "attempts"}, where
+    latency_ms is the duration of the last request.
+    """
+    latency_ms = None
     for attempt in range(retries):
-        output = os.popen(f"curl -s --max-time {timeout} {url} | jq -r .").read().strip()
-        logger.info(f"output for {url}: {output} : attempt: {attempt}")
-        status = os.popen(f"echo '{output}' | jq -r .status").read().strip()
-        if status == "OK":
-            logger.info(f"Service {url} is healthy")
-            return True
-        time.sleep(1)
+        start = time.perf_counter()
+        try:
+            response = await client.get(url, timeout=timeout)
+            latency_ms = round((time.perf_counter() - start) * 1000, 1)
+            logger.info(f"output for {url}: {response.text} : attempt: {attempt} : {latency_ms} ms")
+            if response.json().get("status") == "OK":
+                logger.info(f"Service {url} is healthy")
+                return {"healthy": True, "latency_ms": latency_ms, "attempts": attempt + 1}
+        except (httpx.HTTPError, ValueError, AttributeError) as e:
+            latency_ms = round((time.perf_counter() - start) * 1000, 1)
+            logger.warning(f"Probe of {url} failed: {e!r} : attempt: {attempt}")
+        if attempt < retries - 1:
+            await asyncio.sleep(1)
     logger.error(f"Service {url} is not healthy")
-    return False
+    return {"healthy": False, "latency_ms": latency_ms, "attempts": retries}
+
+async def probe_services(services: dict) -> dict:
+    """
+    Probes every {name: url} concurrently over one shared connection pool. Each probe, including its
+    retries, is cut off after HEALTH_PROBE_DEADLINE seconds.
+    """
+    async def probe(client, url):
+        try:
+            return await asyncio.wait_for(check_service_health(client, url, HEALTH_PROBE_RETRIES, HEALTH_PROBE_TIMEOUT),
+                                          HEALTH_PROBE_DEADLINE)
+        except asyncio.TimeoutError:
+            logger.error(f"Service {url} did not become healthy within {HEALTH_PROBE_DEADLINE}s")
+            return {"healthy": False, "latency_ms": None, "attempts": None}
+
+    async with httpx.AsyncClient(limits=httpx.Limits(max_connections=len(services))) as client:
+        results = await asyncio.gather(*[probe(client, url) for url in services.values()])
+    return dict(zip(services, results))
 
 def health_check():
     issues = []
-    is_healthy = True
-    se_healthy = check_service_health(f"{SIGNAL_ENGINE_URL}/api/health")
-    sc_healthy = check_service_health(f"{STOCKFLOW_CONTROLLER_URL}/api/admin/health")
-    mie_healthy = check_service_health(f"{MARKET_INTEL_ENGINE_URL}/health")
-
-    if not se_healthy:
-        is_healthy = False
-        issues.append("signal-engine")
-    if not sc_healthy:
-        is_healthy = False
-        issues.append("stockflow-controller")
-    if not mie_healthy:
-        is_healthy = False
-        issues.append("market-intel-engine")
+    services = {
+        "signal-engine": f"{SIGNAL_ENGINE_URL}/api/health",
+        "stockflow-controller": f"{STOCKFLOW_CONTROLLER_URL}/api/admin/health",
+        "market-intel-engine": f"{MARKET_INTEL_ENGINE_URL}/health"
+    }
+    results = asyncio.run(probe_services(services))
+    for name, result in results.items():
+        logger.info(f"{name}: healthy: {result['healthy']}, latency: {result['latency_ms']} ms, attempts: {result['attempts']}")
+        if not result["healthy"]:
+            issues.append(name)
+    is_healthy = not issues
     logger.info(f"health_status: {is_healthy}, issues: {issues}")
     return [is_healthy, issues]
 
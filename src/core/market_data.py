@@ -0,0 +1,155 @@
+"""
+Market data providers.
+
+Every bar download in signal-engine and discovery goes through a provider selected with the
+MARKET_DATA_PROVIDER environment variable:
+
+- "yfinance" (default): live downloads. When MARKET_DATA_RECORD_DIR is set, every download is also
+  written in the replay layout so a real day's scan can be replayed later.
+- "replay": serves recorded bars from REPLAY_DATA_DIR (<dir>/<interval>/<SYMBOL>.parquet or .csv),
+  falling back to deterministic synthetic bars when REPLAY_SYNTHETIC is "true".
+"""
+import os
+import logging
+import threading
+import pandas as pd
+import yfinance as yf
+from bar_store import period_to_timedelta
+import synthetic_bars
+
+logger = logging.getLogger(__name__)
+
+class MarketDataProvider:
+    name = "base"
+
+    def download(self, symbols, interval: str, period: str = None, start=None):
+        """
+        Returns {symbol: frame} with flat OHLCV columns (an empty frame for symbols without data).
+        Either `period` (e.g. "60d") or `start` (first bar to include) is given.
+        """
+        raise NotImplementedError
+
+class YFinanceProvider(MarketDataProvider):
+    name = "yfinance"
+
+    def __init__(self, record_dir: str = None):
+        self.recorder = ReplayProvider(record_dir) if record_dir else None
+
+    def download(self, symbols, interval: str, period: str = None, start=None):
+        data = yf.download(symbols, period=period, start=start, interval=interval, progress=False, auto_adjust=False, group_by="ticker")
+        frames = {}
+        for symbol in symbols:
+            if data is None or data.empty:
+                frames[symbol] = pd.DataFrame()
+            elif isinstance(data.columns, pd.MultiIndex):
+                if symbol in data.columns.get_level_values(0):
+                    # Grouped downloads share one index, so rows where this symbol did not trade are all NaN
+                    frames[symbol] = data[symbol].dropna(how="all")
+                else:
+                    frames[symbol] = pd.DataFrame()
+            elif len(symbols) == 1:
+                frames[symbol] = data.dropna(how="all")
+            else:
+                frames[symbol] = pd.DataFrame()
+        if self.recorder is not None:
+            for symbol, df in frames.items():
+                self.recorder.record(symbol, interval, df)
+        return frames
+
+class ReplayProvider(MarketDataProvider):
+    """
+    Serves bars from local files. Periods are measured back from `as_of` (default: the last recorded bar),
+    so a recorded session replays exactly as it was downloaded.
+    """
+    name = "replay"
+
+    def __init__(self, root: str, synthetic: bool = False, as_of=None):
+        self.root = root
+        self.synthetic = synthetic
+        self.as_of = pd.Timestamp(as_of) if as_of else None
+
+    def _path(self, symbol: str, interval: str, ext: str) -> str:
+        return os.path.join(self.root, interval, f"{symbol.upper()}.{ext}")
+
+    def load(self, symbol: str, interval: str) -> pd.DataFrame:
+        parquet_path = self._path(symbol, interval, "parquet")
+        csv_path = self._path(symbol, interval, "csv")
+        if os.path.exists(parquet_path):
+            return pd.read_parquet(parquet_path)
+        if os.path.exists(csv_path):
+            df = pd.read_csv(csv_path, index_col=0)
+            df.index = pd.to_datetime(df.index, utc=interval != "1d")
+            return df
+        return pd.DataFrame()
+
+    def record(self, symbol: str, interval: str, df: pd.DataFrame) -> None:
+        """
+        Merges downloaded bars into the recorded file for (symbol, interval).
+        """
+        if df.empty:
+            return
+        os.makedirs(os.path.join(self.root, interval), exist_ok=True)
+        existing = self.load(symbol, interval)
+        if not existing.empty:
+            df = pd.concat([existing, df])
+            df = df[~df.index.duplicated(keep="last")].sort_index()
+        path = self._path(symbol, interval, "parquet")
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        df.to_parquet(tmp_path)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _align(ts, index: pd.DatetimeIndex) -> pd.Timestamp:
+        ts = pd.Timestamp(ts)
+        if index.tz is None:
+            return ts.tz_localize(None) if ts.tzinfo is not None else ts
+        return ts.tz_localize(index.tz) if ts.tzinfo is None else ts.tz_convert(index.tz)
+
+    def _slice(self, df: pd.DataFrame, period: str, start) -> pd.DataFrame:
+        if df.empty:
+            return df
+        if self.as_of is not None:
+            df = df[df.index <= self._align(self.as_of, df.index)]
+            if df.empty:
+                return df
+        if start is not None:
+            return df[df.index >= self._align(start, df.index)]
+        if period is not None:
+            return df[df.index > df.index[-1] - period_to_timedelta(period)]
+        return df
+
+    def _synthetic(self, symbol: str, interval: str, period: str) -> pd.DataFrame:
+        days = period_to_timedelta(period or "1y").days
+        trading_days = max(1, days * 5 // 7)
+        bars = trading_days * (len(synthetic_bars.HOURLY_BAR_STARTS) if interval == "1h" else 1)
+        return synthetic_bars.make_bars(symbol, bars, interval, end=self.as_of)
+
+    def download(self, symbols, interval: str, period: str = None, start=None):
+        frames = {}
+        for symbol in symbols:
+            df = self.load(symbol, interval)
+            if df.empty and self.synthetic and interval in ("1d", "1h"):
+                df = self._synthetic(symbol, interval, period)
+            frames[symbol] = self._slice(df, period, start)
+        return frames
+
+def create_provider(name: str = None) -> MarketDataProvider:
+    name = name or os.getenv("MARKET_DATA_PROVIDER", "yfinance")
+    if name == "yfinance":
+        return YFinanceProvider(os.getenv("MARKET_DATA_RECORD_DIR"))
+    if name == "replay":
+        return ReplayProvider(
+            os.getenv("REPLAY_DATA_DIR", "/app/replay-data"),
+            synthetic=os.getenv("REPLAY_SYNTHETIC", "false").lower() == "true",
+            as_of=os.getenv("REPLAY_AS_OF")
+        )
+    raise ValueError(f"Unknown market data provider: {name}")
+
+_provider = None
+
+def get_provider() -> MarketDataProvider:
+    global _provider
+    if _provider is None:
+        _provider = create_provider()
+        logger.info(f"Using market data provider: {_provider.name}")
+    return _provider
@@ -0,0 +1,80 @@
+"""
+Prometheus metrics shared by the signal-engine modules.
+
+prometheus_client is optional: without it every metric is a no-op and render() reports that metrics are
+unavailable. When PROMETHEUS_MULTIPROC_DIR is set (needed with EXECUTION_MODE=process, where the v4
+stages run in worker processes), samples of all processes are aggregated on scrape.
+"""
+import contextlib
+import os
+import time
+
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess
+except ImportError:
+    prometheus_client = None
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+class _NoopMetric:
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, value) -> None:
+        pass
+
+    def inc(self, value=1) -> None:
+        pass
+
+    def dec(self, value=1) -> None:
+        pass
+
+    def time(self):
+        return contextlib.nullcontext()
+
+def histogram(name: str, documentation: str, labelnames=(), buckets=LATENCY_BUCKETS):
+    if prometheus_client is None:
+        return _NoopMetric()
+    return prometheus_client.Histogram(name, documentation, labelnames, buckets=buckets)
+
+def gauge(name: str, documentation: str, labelnames=()):
+    if prometheus_client is None:
+        return _NoopMetric()
+    return prometheus_client.Gauge(name, documentation, labelnames, multiprocess_mode="livesum")
+
+def render():
+    """
+    Returns (body, content_type) for a /metrics endpoint, or (None, None) without prometheus_client.
+    """
+    if prometheus_client is None:
+        return None, None
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return prometheus_client.generate_latest(registry), prometheus_client.CONTENT_TYPE_LATEST
+
+DOWNLOAD_SECONDS = histogram("signal_engine_download_seconds", "Market data download latency per call",
+                             ["interval", "provider"])
+V4_STAGE_SECONDS = histogram("signal_engine_v4_stage_seconds", "Time spent in each stage of BharatQuant v4", ["stage"])
+REQUEST_SECONDS = histogram("signal_engine_request_seconds", "Request latency until the response starts", ["route"])
+THREADPOOL_WAIT_SECONDS = histogram("signal_engine_threadpool_wait_seconds",
+                                    "Time v4 computations wait for a free worker", ["mode"])
+RESPONSE_BYTES = histogram("signal_engine_response_bytes", "Response body size", ["route"], buckets=SIZE_BUCKETS)
+IN_FLIGHT_REQUESTS = gauge("signal_engine_in_flight_requests", "Requests currently being handled")
+
+class StageTimer:
+    """
+    Records the time since the previous mark (or since creation) under the given v4 stage name.
+    """
+
+    def __init__(self):
+        self.last = time.perf_counter()
+
+    def mark(self, stage: str) -> None:
+        now = time.perf_counter()
+        V4_STAGE_SECONDS.labels(stage).observe(now - self.last)
+        self.last = now
@@ -0,0 +1,229 @@
+"""
+Cross-sectional indicator engine.
+
+Every function works on 2-D float arrays shaped (bars x symbols). Each column holds one symbol's bars
+aligned at the latest bar, with shorter histories padded by leading NaN (see stack_panel). The results
+match calculate_rsi, calculate_macd_signal, calculate_bollinger_bands and calculate_cmf in
+signal_functions, computed for the whole universe in one pass instead of once per ticker. Inputs come either
+from per-symbol frames (compute_universe) or from a compact bar_panel.BarPanel (compute_panel).
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+def stack_panel(frames, columns, symbols=None, length: int = None):
+    """
+    Stacks columns of several per-symbol frames into (bars x symbols) float64 arrays,
+    right-aligned on the latest bar and padded with leading NaN. Returns (symbols, {column: array}).
+    """
+    symbols = list(frames) if symbols is None else list(symbols)
+    columns = list(columns)
+    if length is None:
+        length = max((len(frames[symbol]) for symbol in symbols), default=0)
+    panels = np.full((len(columns), length, len(symbols)), np.nan)
+    for j, symbol in enumerate(symbols):
+        frame = frames[symbol]
+        n = min(len(frame), length)
+        if n == 0:
+            continue
+        for i, column in enumerate(columns):
+            panels[i, length - n:, j] = frame[column].to_numpy(dtype=np.float64)[-n:]
+    return symbols, {column: panels[i] for i, column in enumerate(columns)}
+
+def ewm_mean(values, alpha: float, min_periods: int = 0):
+    """
+    Column-wise equivalent of Series.ewm(alpha=alpha, min_periods=min_periods, adjust=False).mean().
+    """
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    if len(values) == 0:
+        return out
+    old_wt_factor = 1.0 - alpha
+    weighted = values[0].copy()
+    nobs = (weighted == weighted).astype(np.int64)
+    old_wt = np.ones(values.shape[1:])
+    out[0] = np.where(nobs >= min_periods, weighted, np.nan)
+    for i in range(1, len(values)):
+        cur = values[i]
+        is_obs = cur == cur
+        nobs += is_obs
+        started = weighted == weighted
+        # Same recurrence as pandas' ewma with ignore_na=False: gaps decay the old weight
+        old_wt = np.where(started, old_wt * old_wt_factor, old_wt)
+        update = started & is_obs & (weighted != cur)
+        blended = (old_wt * weighted + alpha * cur) / (old_wt + alpha)
+        weighted = np.where(update, blended, weighted)
+        old_wt = np.where(started & is_obs, 1.0, old_wt)
+        weighted = np.where(~started & is_obs, cur, weighted)
+        out[i] = np.where(nobs >= min_periods, weighted, np.nan)
+    return out
+
+def rolling_mean(values, window: int):
+    out = np.full(values.shape, np.nan)
+    if len(values) >= window:
+        out[window - 1:] = sliding_window_view(values, window, axis=0).mean(axis=-1)
+    return out
+
+def rolling_std(values, window: int):
+    out = np.full(values.shape, np.nan)
+    if len(values) >= window:
+        out[window - 1:] = sliding_window_view(values, window, axis=0).std(axis=-1, ddof=1)
+    return out
+
+def rolling_sum(values, window: int):
+    out = np.full(values.shape, np.nan)
+    if len(values) >= window:
+        out[window - 1:] = sliding_window_view(values, window, axis=0).sum(axis=-1)
+    return out
+
+def diff(values):
+    out = np.full(values.shape, np.nan)
+    out[1:] = values[1:] - values[:-1]
+    return out
+
+def last_valid(values, offset: int = 0):
+    """
+    Per column, the value of the (offset+1)-th last non-NaN row (NaN where there is none).
+    """
+    valid = ~np.isnan(values)
+    # Row index counted from the bottom for every valid cell, so the offset-th last valid row is a rank lookup
+    rank_from_end = np.cumsum(valid[::-1], axis=0)[::-1] - 1
+    mask = valid & (rank_from_end == offset)
+    found = mask.any(axis=0)
+    rows = np.argmax(mask, axis=0)
+    out = values[rows, np.arange(values.shape[1])]
+    return np.where(found, out, np.nan), rows, found
+
+def rsi_series(close, period: int = 14):
+    delta = diff(close)
+    gain = np.maximum(delta, 0)
+    loss = -np.minimum(delta, 0)
+    avg_gain = ewm_mean(gain, 1 / period, min_periods=period)
+    avg_loss = ewm_mean(loss, 1 / period, min_periods=period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = avg_gain / avg_loss
+        return 100 - (100 / (1 + rs))
+
+def panel_rsi(close, period: int = 14):
+    """
+    Universe form of calculate_rsi. Returns {'rsi': array, 'rsi_smooth': array}, one value per symbol.
+    """
+    rsi = rsi_series(close, period)
+    latest_rsi, _, _ = last_valid(rsi)
+    rsi_smooth = ewm_mean(rsi, 2 / (5 + 1))[-1]
+    return {
+        'rsi': np.round(latest_rsi, 2),
+        'rsi_smooth': np.round(rsi_smooth, 2)
+    }
+
+def panel_macd(close):
+    """
+    Universe form of calculate_macd_signal. Returns arrays with one entry per symbol.
+    """
+    ema12 = ewm_mean(close, 2 / (12 + 1))
+    ema26 = ewm_mean(close, 2 / (26 + 1))
+    macd = ema12 - ema26
+    signal = ewm_mean(macd, 2 / (9 + 1))
+    hist = macd - signal
+
+    m0, m1, m2, m3 = macd[-1], macd[-2], macd[-3], macd[-4]
+    s0, s1, s2, s3 = signal[-1], signal[-2], signal[-3], signal[-4]
+    h0 = hist[-1]
+
+    prev_above = (m1 > s1) & (m2 > s2) & (m3 > s3)
+    now_above = m0 > s0
+    crossover = np.where(~prev_above & now_above, "bullish_crossover",
+                         np.where(prev_above & ~now_above, "bearish_crossover", "none"))
+    momentum_up = (m0 > m1) & (s0 > s1)
+    lower_line_rising = ((m0 < s0) & (m0 > m1)) | ((s0 <= m0) & (s0 > s1))
+    is_entry = (crossover == "bullish_crossover") & lower_line_rising
+    strength = np.select([h0 > 0.5, h0 > 0, h0 > -0.5], ["strong_bullish", "moderate_bullish", "weak_bearish"],
+                         default="strong_bearish")
+
+    return {
+        "macd": np.round(m0, 4),
+        "signal": np.round(s0, 4),
+        "histogram": np.round(h0, 4),
+        "crossover": crossover,
+        "trend_strength": strength,
+        "momentum_up": momentum_up,
+        "is_potential_entry": is_entry
+    }
+
+def panel_bollinger_bands(close, window: int = 20, num_std: float = 2):
+    """
+    Universe form of calculate_bollinger_bands. Returns arrays with one entry per symbol.
+    """
+    middle_band = rolling_mean(close, window)
+    std_dev = rolling_std(close, window)
+    upper_band = middle_band + (std_dev * num_std)
+    lower_band = middle_band - (std_dev * num_std)
+
+    cols = np.arange(close.shape[1])
+    mb_latest, last_rows, found_last = last_valid(middle_band)
+    mb_prev, prev_rows, found_prev = last_valid(middle_band, offset=1)
+    if not found_prev.all():
+        raise ValueError("Not enough data points after rolling window to compute Bollinger Bands")
+
+    price = close[last_rows, cols]
+    price_prev = close[prev_rows, cols]
+    ub_latest = upper_band[last_rows, cols]
+    lb_latest = lower_band[last_rows, cols]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        band_width = np.where(mb_latest != 0, (ub_latest - lb_latest) / mb_latest, 0)
+        bandwidth_series = (upper_band - lower_band) / middle_band
+    avg_bandwidth_latest = rolling_mean(bandwidth_series, window)[last_rows, cols]
+    is_squeeze = ~np.isnan(avg_bandwidth_latest) & (band_width < avg_bandwidth_latest * 0.5)
+
+    return {
+        'middle_band': mb_latest,
+        'upper_band': ub_latest,
+        'lower_band': lb_latest,
+        'is_overbought': price >= ub_latest * 0.98,
+        'is_oversold': price <= lb_latest * 1.02,
+        'is_squeeze': is_squeeze,
+        'band_width': band_width,
+        'price': price,
+        'crossed_above_middle': (price_prev < mb_prev) & (price > mb_latest),
+        'crossed_below_middle': (price_prev > mb_prev) & (price < mb_latest),
+    }
+
+def panel_cmf(high, low, close, volume, window: int = 20):
+    """
+    Universe form of calculate_cmf. Returns {'latest_cmf': array}, one float per symbol.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mf_multiplier = ((close - low) - (high - close)) / (high - low)
+    mf_multiplier[np.isinf(mf_multiplier)] = 0
+    mf_volume = mf_multiplier * volume
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cmf = rolling_sum(mf_volume, window) / rolling_sum(volume, window)
+    latest_cmf, _, _ = last_valid(cmf)
+    return {'latest_cmf': latest_cmf}
+
+def compute_universe(frames, window: int = 20, num_std: float = 2, period: int = 14):
+    """
+    Runs RSI, MACD, Bollinger Bands and CMF for every frame in {symbol: frame} in one pass.
+    Returns (symbols, {'rsi': ..., 'macd': ..., 'bb': ..., 'cmf': ...}) with arrays aligned to symbols.
+    """
+    symbols, panels = stack_panel(frames, ['High', 'Low', 'Close', 'Volume'])
+    return symbols, compute_indicators(panels['High'], panels['Low'], panels['Close'], panels['Volume'],
+                                       window, num_std, period)
+
+def compute_panel(panel, window: int = 20, num_std: float = 2, period: int = 14, dtype=np.float64):
+    """
+    compute_universe for a bar_panel.BarPanel. By default the prices are widened to float64 for the pass
+    only, so just the compact panel stays resident between passes. With dtype=np.float32 the rolling
+    passes read the stored prices without a copy (the EMA recurrences still accumulate in float64), at
+    float32 precision. Volume is always read as float64.
+    """
+    columns = [panel.column(name, dtype) for name in ('High', 'Low', 'Close')] + [panel.column('Volume')]
+    return panel.symbols, compute_indicators(*columns, window, num_std, period)
+
+def compute_indicators(high, low, close, volume, window: int = 20, num_std: float = 2, period: int = 14):
+    return {
+        'rsi': panel_rsi(close, period),
+        'macd': panel_macd(close),
+        'bb': panel_bollinger_bands(close, window, num_std),
+        'cmf': panel_cmf(high, low, close, volume, window)
+    }
@@ -0,0 +1,169 @@
+"""
+Bar-close pre-warm scheduler.
+
+Shortly after every NSE hourly bar closes (and at extra times of day, such as just before the
+signal-check CronJob), downloads the daily and hourly bars of the whole universe in grouped requests
+and precomputes BharatQuant v4 for each ticker, so the CronJob and ad-hoc requests find the frame and
+result caches already warm. Bar-close passes cache their frames for the normal frame TTL, so requests
+between passes still pick up the forming bar; a pass before the session opens keeps its frames until the
+open, since no bar can change before then. Weekends and the configured exchange holidays are skipped.
+"""
+import asyncio
+import datetime
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# NSE has no daylight saving, so a fixed offset is enough (and needs no tz database in the image)
+IST = datetime.timezone(datetime.timedelta(hours=5, minutes=30), "IST")
+# Hourly bars start at 09:15, 10:15, ..., 15:15; the last one closes with the session at 15:30
+BAR_CLOSES = [datetime.time(hour, 15) for hour in range(10, 16)] + [datetime.time(15, 30)]
+SESSION_OPEN = datetime.time(9, 15)
+
+def parse_holidays(value: str) -> set:
+    """
+    Parses a comma-separated list of YYYY-MM-DD dates.
+    """
+    return {datetime.date.fromisoformat(day.strip()) for day in (value or "").split(",") if day.strip()}
+
+def parse_times(value: str) -> list:
+    """
+    Parses a comma-separated list of HH:MM times of day (IST).
+    """
+    return [datetime.time.fromisoformat(part.strip()) for part in (value or "").split(",") if part.strip()]
+
+def is_trading_day(day: datetime.date, holidays: set) -> bool:
+    return day.weekday() < 5 and day not in holidays
+
+def next_run_time(now: datetime.datetime, delay_seconds: float, holidays: set, extra_times=()) -> datetime.datetime:
+    """
+    First bar close plus delay_seconds, or extra time of day, that is strictly after `now`, on a trading day (IST).
+    """
+    now = now.astimezone(IST)
+    delay = datetime.timedelta(seconds=delay_seconds)
+    day = now.date()
+    # Long weekends plus holiday runs never exceed a couple of weeks
+    for _ in range(30):
+        if is_trading_day(day, holidays):
+            run_times = [datetime.datetime.combine(day, close, tzinfo=IST) + delay for close in BAR_CLOSES]
+            run_times += [datetime.datetime.combine(day, extra, tzinfo=IST) for extra in extra_times]
+            for run_at in sorted(run_times):
+                if run_at > now:
+                    return run_at
+        day += datetime.timedelta(days=1)
+    raise ValueError("No trading day in the next 30 days; check NSE_HOLIDAYS")
+
+def seconds_until_open(now: datetime.datetime, holidays: set):
+    """
+    Seconds from `now` to the session open of the same trading day, or None once the session has opened
+    (or on a non-trading day).
+    """
+    now = now.astimezone(IST)
+    if not is_trading_day(now.date(), holidays) or now.time() >= SESSION_OPEN:
+        return None
+    return (datetime.datetime.combine(now.date(), SESSION_OPEN, tzinfo=IST) - now).total_seconds()
+
+class PrewarmScheduler:
+    """
+    Runs a pre-warm pass after every bar close until cancelled.
+
+    `universe()` returns the tickers to warm, `fetch_chunk(symbols, ttl_seconds)` downloads their bars
+    (blocking, run in a thread) and keeps them cached for ttl_seconds, or the normal frame TTL when it is
+    None, and `warm(ticker)` is a coroutine that computes one ticker from the warm frames.
+    """
+
+    def __init__(self, universe, fetch_chunk, warm, concurrency: int = 8, chunk_size: int = 100,
+                 delay_seconds: float = 60, holidays: set = None, extra_times=()):
+        self.universe = universe
+        self.fetch_chunk = fetch_chunk
+        self.warm = warm
+        self.concurrency = concurrency
+        self.chunk_size = chunk_size
+        self.delay_seconds = delay_seconds
+        self.holidays = holidays or set()
+        self.extra_times = list(extra_times)
+        self.state = "idle"
+        self.next_run = None
+        self.current = None
+        self.last_run = None
+
+    async def run_forever(self) -> None:
+        while True:
+            self.next_run = next_run_time(datetime.datetime.now(IST), self.delay_seconds, self.holidays, self.extra_times)
+            self.state = "sleeping"
+            wait = (self.next_run - datetime.datetime.now(IST)).total_seconds()
+            await asyncio.sleep(max(0.0, wait))
+            bar_close = self.next_run - datetime.timedelta(seconds=self.delay_seconds)
+            try:
+                await self.run_once(bar_close=bar_close if bar_close.time() in BAR_CLOSES else None)
+            except Exception as e:
+                logger.error(f"Pre-warm pass failed: {str(e)}")
+
+    async def run_once(self, bar_close: datetime.datetime = None) -> dict:
+        """
+        Warms every ticker of the universe once and returns the summary also kept in `last_run`.
+        """
+        tickers = list(dict.fromkeys(self.universe()))
+        # Only a pass before the open (such as the one ahead of the CronJob) outlives the normal frame TTL
+        until_open = seconds_until_open(datetime.datetime.now(IST), self.holidays)
+        opens_at = time.monotonic() + until_open if until_open is not None else None
+        progress = {
+            "bar_close": bar_close.isoformat() if bar_close else None,
+            "started": datetime.datetime.now(IST).isoformat(),
+            "finished": None,
+            "tickers": len(tickers),
+            "done": 0,
+            "errors": 0,
+            "duration_seconds": None
+        }
+        self.state = "running"
+        self.current = progress
+        start = time.monotonic()
+        logger.info(f"Pre-warm started for {len(tickers)} tickers")
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def warm_one(ticker: str) -> None:
+            async with semaphore:
+                try:
+                    result = await self.warm(ticker)
+                    if result is None or "error" in result:
+                        progress["errors"] += 1
+                except Exception as e:
+                    logger.warning(f"Pre-warm failed for {ticker}: {str(e)}")
+                    progress["errors"] += 1
+            progress["done"] += 1
+
+        try:
+            for offset in range(0, len(tickers), self.chunk_size):
+                chunk = tickers[offset:offset + self.chunk_size]
+                try:
+                    ttl_seconds = opens_at - time.monotonic() if opens_at is not None else None
+                    if ttl_seconds is not None and ttl_seconds <= 0:
+                        ttl_seconds = None
+                    await asyncio.to_thread(self.fetch_chunk, chunk, ttl_seconds)
+                except Exception as e:
+                    # Tickers of a failed chunk fall back to their own downloads in warm()
+                    logger.warning(f"Pre-warm download failed for chunk at {offset}: {str(e)}")
+                await asyncio.gather(*[warm_one(ticker) for ticker in chunk])
+        finally:
+            progress["finished"] = datetime.datetime.now(IST).isoformat()
+            progress["duration_seconds"] = round(time.monotonic() - start, 2)
+            self.last_run = progress
+            self.current = None
+            self.state = "idle"
+        logger.info(f"Pre-warm finished: {progress['done']} tickers, {progress['errors']} errors "
+                    f"in {progress['duration_seconds']}s")
+        return progress
+
+    def status(self) -> dict:
+        return {
+            "state": self.state,
+            "next_run": self.next_run.isoformat() if self.next_run else None,
+            "current": dict(self.current) if self.current else None,
+            "last_run": self.last_run,
+            "concurrency": self.concurrency,
+            "delay_seconds": self.delay_seconds,
+            "extra_times": [extra.isoformat(timespec="minutes") for extra in self.extra_times],
+            "holidays": sorted(day.isoformat() for day in self.holidays)
+        }
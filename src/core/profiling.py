@@ -0,0 +1,77 @@
+"""
+On-demand profiling of a single call (used by the profile=true flag of /api/{stock_id}).
+"""
+import cProfile
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+
+# tracemalloc is process-wide, so profiled calls run one at a time
+_profile_lock = threading.Lock()
+
+LIBRARIES = ("yfinance", "pandas", "numpy", "requests", "urllib3")
+
+def library_of(filename: str) -> str:
+    parts = filename.replace("\\", "/").split("/")
+    for library in LIBRARIES:
+        if library in parts:
+            return library
+    if filename == "~":
+        return "builtins"
+    return "other"
+
+def function_label(func) -> str:
+    filename, line, name = func
+    if filename == "~":
+        return name
+    return f"{os.path.basename(filename)}:{line}({name})"
+
+def profile_call(fn, *args, top: int = 25, cumulative_of=(), **kwargs):
+    """
+    Runs fn(*args, **kwargs) under cProfile and tracemalloc. Returns (result, profile) where profile holds
+    the wall time, the `top` functions by cumulative time, self time grouped by library, the cumulative time
+    of each function named in `cumulative_of`, and memory figures: the blocks allocated during the call that
+    are still alive when it returns, and the peak traced size (tracemalloc also sees other threads).
+    """
+    with _profile_lock:
+        profiler = cProfile.Profile()
+        tracemalloc.start()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            profiler.disable()
+            wall_seconds = time.perf_counter() - start
+            snapshot = tracemalloc.take_snapshot()
+            _, peak_bytes = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+    stats = pstats.Stats(profiler).stats  # {func: (primitive calls, calls, tottime, cumtime, callers)}
+    ranked = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:top]
+    self_time = {}
+    for func, (_, _, tottime, _, _) in stats.items():
+        library = library_of(func[0])
+        self_time[library] = self_time.get(library, 0.0) + tottime
+    cumulative = {
+        name: round(sum(entry[3] for func, entry in stats.items() if func[2] == name), 6)
+        for name in cumulative_of
+    }
+    retained = snapshot.statistics("filename")
+
+    return result, {
+        "wall_seconds": round(wall_seconds, 6),
+        "top_functions": [
+            {"function": function_label(func), "calls": calls, "tottime": round(tottime, 6), "cumtime": round(cumtime, 6)}
+            for func, (_, calls, tottime, cumtime, _) in ranked
+        ],
+        "self_time_by_library": {library: round(seconds, 6) for library, seconds in sorted(self_time.items(), key=lambda item: -item[1])},
+        "cumulative_seconds": cumulative,
+        "memory": {
+            "retained_blocks": sum(stat.count for stat in retained),
+            "retained_bytes": sum(stat.size for stat in retained),
+            "peak_bytes": peak_bytes
+        }
+    }
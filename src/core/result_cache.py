@@ -0,0 +1,81 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+def bar_fingerprint(df):
+    """
+    Identifies the latest bar of a frame: its timestamp plus its close and volume, so a bar that is
+    still forming (same timestamp, new prices) gets a new fingerprint.
+    """
+    if df is None or df.empty:
+        return None
+    last = df.iloc[-1]
+    return (df.index[-1].isoformat(), float(last['Close']), float(last['Volume']))
+
+class ResultCache:
+    """
+    Bounded LRU cache of computed signal responses keyed by (symbol, strategy parameters, latest bars).
+
+    Repeated requests for a ticker within one bar are answered from here instead of re-running the
+    indicator pipeline. Each key also yields a weak ETag, so clients can revalidate with If-None-Match.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> result
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.not_modified = 0
+
+    @staticmethod
+    def make_key(symbol: str, params: tuple, df_daily, df_hourly):
+        """
+        Returns the cache key, or None when either timeframe has no bars (such responses are not cached).
+        """
+        daily, hourly = bar_fingerprint(df_daily), bar_fingerprint(df_hourly)
+        if daily is None or hourly is None:
+            return None
+        return (symbol.upper(), tuple(params), daily, hourly)
+
+    @staticmethod
+    def etag(key) -> str:
+        return 'W/"' + hashlib.sha1(repr(key).encode()).hexdigest() + '"'
+
+    def get(self, key):
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key, result) -> None:
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def record_not_modified(self) -> None:
+        with self._lock:
+            self.not_modified += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "not_modified": self.not_modified,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+            }
@@ -0,0 +1,179 @@
+"""
+Memory-mapped bar cache shared by every process of a pod.
+
+Frames are published under <root>/<interval>/<period>/<SYMBOL>/ as NumPy arrays plus a small
+current.json holding a version counter and the column metadata. Every process maps the arrays of
+the current version read-only, so uvicorn workers and pool processes share one copy of the bars in
+the page cache, and a stale entry is downloaded once per pod: the first process to find it stale takes
+the entry's file lock, while the others wait for it and then map the version it published.
+"""
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+class SharedBarCache:
+    def __init__(self, root: str, ttl_seconds: float):
+        self.root = root
+        self.ttl_seconds = ttl_seconds
+        self._mapped = {}  # key -> (version, frame) mapped by this process
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.remaps = 0
+        self.publishes = 0
+        os.makedirs(root, exist_ok=True)
+
+    def _dir(self, symbol: str, interval: str, period: str) -> str:
+        return os.path.join(self.root, interval, period, symbol.upper())
+
+    @contextmanager
+    def lock(self, symbol: str, interval: str, period: str):
+        """
+        Exclusive per-entry lock shared by every thread and process using the same root.
+        """
+        path = self._dir(symbol, interval, period)
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, ".lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _current(self, path: str):
+        try:
+            with open(os.path.join(path, "current.json")) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _map(self, path: str, meta: dict) -> pd.DataFrame:
+        version = meta["version"]
+        values = np.load(os.path.join(path, f"{version}.values.npy"), mmap_mode="r")
+        index = pd.DatetimeIndex(np.load(os.path.join(path, f"{version}.index.npy")).view("datetime64[ns]"),
+                                 name=meta["index_name"])
+        if meta["tz"] is not None:
+            index = index.tz_localize("UTC").tz_convert(meta["tz"])
+        # values is stored (columns x bars), so its transpose is the frame's single block without a copy
+        return pd.DataFrame(values.T, index=index, columns=meta["columns"], copy=False)
+
+    def _lookup(self, symbol: str, interval: str, period: str, now: float):
+        """
+        Returns the frame of the current version, or None when the entry is missing or expired.
+        """
+        key = (symbol, interval, period)
+        path = self._dir(symbol, interval, period)
+        # A writer may remove the files of an old version between reading current.json and mapping them
+        for _ in range(3):
+            meta = self._current(path)
+            if meta is None or now > meta.get("expires", meta["updated"] + self.ttl_seconds):
+                return None
+            with self._lock:
+                mapped = self._mapped.get(key)
+            if mapped is not None and mapped[0] == meta["version"]:
+                return mapped[1]
+            try:
+                frame = self._map(path, meta)
+            except FileNotFoundError:
+                continue
+            with self._lock:
+                self._mapped[key] = (meta["version"], frame)
+                self.remaps += 1
+            return frame
+        return None
+
+    def _publish(self, symbol: str, interval: str, period: str, frame: pd.DataFrame, ttl_seconds: float = None) -> None:
+        """
+        Writes a new version of the entry. Callers must hold the entry lock.
+        """
+        path = self._dir(symbol, interval, period)
+        previous = self._current(path)
+        version = previous["version"] + 1 if previous else 1
+        index = pd.DatetimeIndex(frame.index)
+        np.save(os.path.join(path, f"{version}.values.npy"), frame.to_numpy(dtype=np.float64).T.copy())
+        np.save(os.path.join(path, f"{version}.index.npy"), index.as_unit("ns").asi8)
+        updated = time.time()
+        meta = {
+            "version": version,
+            "updated": updated,
+            "expires": updated + (self.ttl_seconds if ttl_seconds is None else ttl_seconds),
+            "columns": [str(column) for column in frame.columns],
+            "tz": str(index.tz) if index.tz is not None else None,
+            "index_name": index.name
+        }
+        tmp_path = os.path.join(path, "current.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(path, "current.json"))
+        # Processes still mapping an older version keep their pages until they remap
+        for name in os.listdir(path):
+            if name.endswith(".npy") and not name.startswith(f"{version}."):
+                os.remove(os.path.join(path, name))
+        self.publishes += 1
+
+    def get_many(self, symbols, interval: str, period: str, fetch, ttl_seconds: float = None, refresh: bool = False):
+        """
+        Returns {symbol: frame}. `fetch(missing_symbols)` must return {symbol: frame}; it is called at most
+        once, for the symbols that are still missing or stale after their entry locks are held.
+        Frames are returned as shallow copies of read-only mapped frames. `ttl_seconds` overrides the TTL of
+        the entries this call publishes, and `refresh` treats every entry as stale.
+        """
+        now = time.time()
+        results = {}
+        missing = []
+        for symbol in dict.fromkeys(symbols):
+            frame = None if refresh else self._lookup(symbol, interval, period, now)
+            if frame is None:
+                missing.append(symbol)
+            else:
+                results[symbol] = frame
+
+        if missing:
+            with ExitStack() as stack:
+                # Locks are taken in sorted order so concurrent batches cannot deadlock
+                for symbol in sorted(missing):
+                    stack.enter_context(self.lock(symbol, interval, period))
+                stale = []
+                for symbol in missing:
+                    # Another process may have published the entry while this one waited for the lock
+                    frame = None if refresh else self._lookup(symbol, interval, period, time.time())
+                    if frame is None:
+                        stale.append(symbol)
+                    else:
+                        results[symbol] = frame
+                if stale:
+                    fetched = fetch(stale)
+                    for symbol in stale:
+                        frame = fetched.get(symbol)
+                        results[symbol] = frame
+                        if frame is not None and not frame.empty:
+                            self._publish(symbol, interval, period, frame, ttl_seconds)
+                with self._lock:
+                    self.misses += len(stale)
+                    self.hits += len(results) - len(stale)
+        else:
+            with self._lock:
+                self.hits += len(results)
+
+        return {symbol: (frame.copy(deep=False) if frame is not None else frame) for symbol, frame in results.items()}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "hits": self.hits,
+                "misses": self.misses,
+                "remaps": self.remaps,
+                "publishes": self.publishes,
+                "mapped": len(self._mapped),
+                "root": self.root,
+                "ttl_seconds": self.ttl_seconds,
+            }
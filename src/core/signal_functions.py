@@ -1,16 +1,30 @@
-import yfinance as yf
 import pandas as pd
 from datetime import datetime
 import numpy as np
-
-def calculate_final_signal(logging,stock_id: str,interval: str,period: int,window: int, num_std: float):
-    nse_symbol = stock_id.upper()
-    df = yf.download(nse_symbol, period="1y", interval=interval, progress=False, auto_adjust=False)
-    return calculate_bharatquant_v4(logging,stock_id)
+import os
+import time
+import logging
+from concurrent.futures.process import BrokenProcessPool
+from bar_store import BarStore
+from frame_cache import FrameCache
+from shared_bars import SharedBarCache
+from result_cache import ResultCache
+import market_data
+import metrics
+
+BAR_STORE_DIR = os.getenv("BAR_STORE_DIR")
+bar_store = BarStore(BAR_STORE_DIR) if BAR_STORE_DIR else None
+FRAME_CACHE_MAX_MB = int(os.getenv("FRAME_CACHE_MAX_MB", "256"))
+FRAME_CACHE_TTL = float(os.getenv("FRAME_CACHE_TTL", "300"))
+frame_cache = FrameCache(FRAME_CACHE_MAX_MB * 1024 * 1024, FRAME_CACHE_TTL) if FRAME_CACHE_MAX_MB > 0 else None
+SHARED_BAR_DIR = os.getenv("SHARED_BAR_DIR")
+shared_bars = SharedBarCache(SHARED_BAR_DIR, FRAME_CACHE_TTL) if SHARED_BAR_DIR else None
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "2048"))
+result_cache = ResultCache(RESULT_CACHE_SIZE) if RESULT_CACHE_SIZE > 0 else None
 
 def calculate_individual(logging,option: str, stock_id: str,interval: str,period: int,window: int, num_std: float):
     nse_symbol = stock_id.upper()
-    df = yf.download(nse_symbol, period="1y", interval=interval, progress=False, auto_adjust=False)
+    df = fetch_ohlcv(nse_symbol, "1y", interval)
     logging.info(f"Fetched data for {nse_symbol}")
     if option=="rsi":
         logging.info(f"Calculated RSI for {nse_symbol}")
@@ -237,22 +251,103 @@ def should_buy(rsi_result, macd_result, bb_result, cmf_result):
         'strength': f"{signal_strength}"
     }
 
-def calculate_rsi(stock_symbol: str, df, period: int, interval: str) -> float:
+class FeatureFrame:
+    """
+    Memoized derived series for one symbol and timeframe.
+
+    Each series (price change, RSI, EMAs, rolling mean/std, Bollinger bands and bandwidth, true range,
+    money-flow volume) is computed on first use and reused by every layer of calculate_bharatquant_v4.
+    Expects a frame with flat OHLCV columns.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self._cache = {}
+
+    def _memo(self, key, compute):
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    @property
+    def close(self):
+        return self._memo("close", lambda: self.df['Close'])
+
+    @property
+    def delta(self):
+        return self._memo("delta", lambda: self.close.diff())
+
+    def rsi(self, period: int = 14):
+        def compute():
+            gain = self.delta.clip(lower=0)
+            loss = -self.delta.clip(upper=0)
+            # Wilder's smoothing (using EMA)
+            avg_gain = gain.ewm(alpha=1/period, min_periods=period, adjust=False).mean()
+            avg_loss = loss.ewm(alpha=1/period, min_periods=period, adjust=False).mean()
+            rs = avg_gain / avg_loss
+            return 100 - (100 / (1 + rs))
+        return self._memo(("rsi", period), compute)
+
+    def ema(self, span: int):
+        return self._memo(("ema", span), lambda: self.close.ewm(span=span, adjust=False).mean())
+
+    def rolling_mean(self, window: int):
+        return self._memo(("rolling_mean", window), lambda: self.close.rolling(window).mean())
+
+    def rolling_std(self, window: int):
+        return self._memo(("rolling_std", window), lambda: self.close.rolling(window).std())
+
+    def bollinger_bands(self, window: int = 20, num_std: float = 2):
+        def compute():
+            middle_band = self.rolling_mean(window)
+            std_dev = self.rolling_std(window)
+            return middle_band, middle_band + (std_dev * num_std), middle_band - (std_dev * num_std)
+        return self._memo(("bollinger_bands", window, num_std), compute)
+
+    def bandwidth(self, window: int = 20, num_std: float = 2):
+        def compute():
+            middle_band, upper_band, lower_band = self.bollinger_bands(window, num_std)
+            return (upper_band - lower_band) / middle_band
+        return self._memo(("bandwidth", window, num_std), compute)
+
+    @property
+    def true_range(self):
+        def compute():
+            high, low, prev_close = self.df['High'], self.df['Low'], self.close.shift()
+            return pd.concat([high - low, (high - prev_close).abs(), (low - prev_close).abs()], axis=1).max(axis=1)
+        return self._memo("true_range", compute)
+
+    @property
+    def money_flow(self):
+        """
+        (money-flow volume, volume) on the rows with complete HLCV data, as used by CMF.
+        """
+        def compute():
+            df = self.df.dropna(subset=['High', 'Low', 'Close', 'Volume'])
+            mf_multiplier = ((df['Close'] - df['Low']) - (df['High'] - df['Close'])) / (df['High'] - df['Low'])
+            mf_multiplier = mf_multiplier.replace([float('inf'), -float('inf')], 0)  # handle division by zero
+            return mf_multiplier * df['Volume'], df['Volume']
+        return self._memo("money_flow", compute)
+
+def calculate_rsi(stock_symbol: str, df, period: int, interval: str, features=None) -> float:
 
     if df.empty or 'Close' not in df.columns:
         return {"error": "Could not fetch data for {stock_symbol}."}
 
-    close = df['Close']
-    delta = close.diff()
-    gain = delta.clip(lower=0)
-    loss = -delta.clip(upper=0)
+    if features is not None:
+        rsi = features.rsi(period)
+    else:
+        close = df['Close']
+        delta = close.diff()
+        gain = delta.clip(lower=0)
+        loss = -delta.clip(upper=0)
 
-    # Wilder's smoothing (using EMA)
-    avg_gain = gain.ewm(alpha=1/period, min_periods=period, adjust=False).mean()
-    avg_loss = loss.ewm(alpha=1/period, min_periods=period, adjust=False).mean()
+        # Wilder's smoothing (using EMA)
+        avg_gain = gain.ewm(alpha=1/period, min_periods=period, adjust=False).mean()
+        avg_loss = loss.ewm(alpha=1/period, min_periods=period, adjust=False).mean()
 
-    rs = avg_gain / avg_loss
-    rsi = 100 - (100 / (1 + rs))
+        rs = avg_gain / avg_loss
+        rsi = 100 - (100 / (1 + rs))
 
     # Drop NaNs and get latest value
     latest_rsi = rsi.dropna().iloc[-1]
@@ -271,14 +366,18 @@ def calculate_rsi(stock_symbol: str, df, period: int, interval: str) -> float:
         'rsi_smooth': round(float(val_smooth), 2)
     }
 
-def calculate_macd_signal(stock_symbol: str, df, interval: str) -> dict:
+def calculate_macd_signal(stock_symbol: str, df, interval: str, features=None) -> dict:
     symbol = stock_symbol.upper()
     if df.empty or 'Close' not in df.columns:
         raise ValueError(f"Could not fetch data for {stock_symbol}.")
 
-    close = df['Close']
-    ema12 = close.ewm(span=12, adjust=False).mean()
-    ema26 = close.ewm(span=26, adjust=False).mean()
+    if features is not None:
+        ema12 = features.ema(12)
+        ema26 = features.ema(26)
+    else:
+        close = df['Close']
+        ema12 = close.ewm(span=12, adjust=False).mean()
+        ema26 = close.ewm(span=26, adjust=False).mean()
 
     macd = (ema12 - ema26).squeeze()
     signal = macd.ewm(span=9, adjust=False).mean().squeeze()
@@ -333,14 +432,17 @@ def calculate_macd_signal(stock_symbol: str, df, interval: str) -> dict:
         "is_potential_entry": is_entry
     }
 
-def calculate_bollinger_bands(stock_symbol: str, df, window: int, num_std: float):
+def calculate_bollinger_bands(stock_symbol: str, df, window: int, num_std: float, features=None):
     data = df
     close = data['Close']
-    middle_band = close.rolling(window).mean()
-    std_dev = close.rolling(window).std()
+    if features is not None:
+        middle_band, upper_band, lower_band = features.bollinger_bands(window, num_std)
+    else:
+        middle_band = close.rolling(window).mean()
+        std_dev = close.rolling(window).std()
 
-    upper_band = middle_band + (std_dev * num_std)
-    lower_band = middle_band - (std_dev * num_std)
+        upper_band = middle_band + (std_dev * num_std)
+        lower_band = middle_band - (std_dev * num_std)
 
     # Drop NaNs at start to get valid indices
     valid_idx = middle_band.dropna().index
@@ -382,7 +484,7 @@ def calculate_bollinger_bands(stock_symbol: str, df, window: int, num_std: float
     is_overbought = price >= ub_latest * overbought_threshold
     is_oversold = price <= lb_latest * oversold_threshold
 
-    bandwidth_series = (upper_band - lower_band) / middle_band
+    bandwidth_series = features.bandwidth(window, num_std) if features is not None else (upper_band - lower_band) / middle_band
     avg_bandwidth = bandwidth_series.rolling(window).mean()
     avg_bandwidth_latest = avg_bandwidth.loc[last_idx]
     avg_bandwidth_latest = to_scalar(avg_bandwidth_latest, "avg_bandwidth_latest")
@@ -407,7 +509,14 @@ def calculate_bollinger_bands(stock_symbol: str, df, window: int, num_std: float
         'crossed_below_middle': crossed_below_middle,
     }
 
-def calculate_cmf(stock_symbol: str,df, period: str, interval: str, window: int = 20):
+def calculate_cmf(stock_symbol: str,df, period: str, interval: str, window: int = 20, features=None):
+    if features is not None:
+        mf_volume, volume = features.money_flow
+        cmf = mf_volume.rolling(window=window).sum() / volume.rolling(window=window).sum()
+        latest_cmf = cmf.dropna().iloc[-1]
+        return {
+            'latest_cmf': f"{latest_cmf}"
+        }
     df.columns = df.columns.get_level_values(0)
     df = df.copy()
     df.dropna(subset=['High', 'Low', 'Close', 'Volume'], inplace=True)
@@ -422,19 +531,25 @@ def calculate_cmf(stock_symbol: str,df, period: str, interval: str, window: int
         #'slope': f"{slope}"
     }
 
-def to_native(obj):
+def find_swing_points(values, half_window: int, kind: str = "trough", count: int = 2):
     """
-    Recursively converts numpy types to standard python types for JSON serialization.
+    Positions of the last `count` swing points, oldest first. A bar is a trough (peak) when it equals the
+    min (max) of the 2*half_window+1 bars centred on it, the same test as
+    rolling(2*half_window+1, center=True).min() == values (windows with NaN/inf never match).
+    Scans backward from the newest complete window and stops at the count-th match.
     """
-    if isinstance(obj, dict):
-        return {k: to_native(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [to_native(i) for i in obj]
-    elif isinstance(obj, (np.bool_, np.integer, np.floating)):
-        return obj.item()
-    elif isinstance(obj, np.ndarray):
-        return to_native(obj.tolist())
-    return obj
+    values = np.asarray(values, dtype=np.float64)
+    found = []
+    for i in range(len(values) - 1 - half_window, half_window - 1, -1):
+        segment = values[i - half_window:i + half_window + 1]
+        if not np.isfinite(segment).all():
+            continue
+        extreme = segment.min() if kind == "trough" else segment.max()
+        if values[i] == extreme:
+            found.append(i)
+            if len(found) == count:
+                break
+    return found[::-1]
 
 def detect_market_structure(df, window=5):
     """
@@ -443,20 +558,16 @@ def detect_market_structure(df, window=5):
     if len(df) < window * 2 + 1:
         return {"structure": "Insufficient Data", "is_higher_low": False}
     
-    # Identify local peaks and troughs
-    # A peak is a high higher than 'window' bars before and after
-    df = df.copy()
-    df['peak'] = df['High'].rolling(window=window*2+1, center=True).max() == df['High']
-    df['trough'] = df['Low'].rolling(window=window*2+1, center=True).min() == df['Low']
-    
-    peaks = df[df['peak']]['High']
-    troughs = df[df['trough']]['Low']
+    # Identify the last two local troughs
+    # A trough is a low lower than 'window' bars before and after
+    lows = df['Low'].to_numpy(dtype=np.float64)
+    troughs = find_swing_points(lows, window, "trough", 2)
     
     if len(troughs) < 2:
         return {"structure": "Building", "is_higher_low": False}
     
-    last_trough = troughs.iloc[-1]
-    prev_trough = troughs.iloc[-2]
+    last_trough = lows[troughs[-1]]
+    prev_trough = lows[troughs[-2]]
     
     is_higher_low = last_trough > prev_trough
     
@@ -476,42 +587,59 @@ def detect_rsi_divergence(df, rsi_series, window=20):
     if len(df) < window:
         return {"divergence": False}
     
-    # Look at recent local lows
-    df = df.copy()
-    df['rsi'] = rsi_series
-    df['low_swing'] = df['Low'].rolling(window=5, center=True).min() == df['Low']
-    
-    lows = df[df['low_swing']].tail(2)
+    # Look at the two most recent local lows (5-bar centred window)
+    lows = df['Low'].to_numpy(dtype=np.float64)
+    swings = find_swing_points(lows, 2, "trough", 2)
     
-    if len(lows) < 2:
+    if len(swings) < 2:
         return {"divergence": False}
     
-    p1, p2 = lows['Low'].iloc[0], lows['Low'].iloc[1]
-    r1, r2 = lows['rsi'].iloc[0], lows['rsi'].iloc[1]
+    if isinstance(rsi_series, pd.Series) and not rsi_series.index.equals(df.index):
+        rsi_series = rsi_series.reindex(df.index)
+    rsi = np.asarray(rsi_series, dtype=np.float64)
+    
+    p1, p2 = lows[swings[0]], lows[swings[1]]
+    r1, r2 = rsi[swings[0]], rsi[swings[1]]
     
     # Bullish Divergence: Price Lower Low, RSI Higher Low
     is_divergence = p2 < p1 and r2 > r1
     
     return {"divergence": is_divergence}
 
-def detect_bb_squeeze(df, window=20):
+def last_rolling_percentile(series, window: int):
+    """
+    Equivalent of series.rolling(window).rank(pct=True).iloc[-1] that only ranks the last window
+    (average rank for ties, NaN when the window holds a NaN/inf or is shorter than `window`).
+    """
+    values = np.asarray(series, dtype=np.float64)[-window:]
+    if window < 1 or len(values) < window or not np.isfinite(values).all():
+        return np.float64(np.nan)
+    latest = values[-1]
+    less = np.count_nonzero(values < latest)
+    equal = np.count_nonzero(values == latest)
+    return np.float64((less + (equal + 1) / 2) / window)
+
+def detect_bb_squeeze(df, window=20, features=None):
     """
     Detects Bollinger Band Squeeze (low volatility before breakout).
     """
-    close = df['Close']
-    middle_band = close.rolling(window).mean()
-    std_dev = close.rolling(window).std()
-    upper_band = middle_band + (2 * std_dev)
-    lower_band = middle_band - (2 * std_dev)
-    
-    bandwidth = (upper_band - lower_band) / middle_band
+    if features is not None:
+        bandwidth = features.bandwidth(window, 2)
+    else:
+        close = df['Close']
+        middle_band = close.rolling(window).mean()
+        std_dev = close.rolling(window).std()
+        upper_band = middle_band + (2 * std_dev)
+        lower_band = middle_band - (2 * std_dev)
+
+        bandwidth = (upper_band - lower_band) / middle_band
     # A squeeze is defined as bandwidth being in the bottom 25% of its recent history
     # Use a smaller window for rank if data is short
     rank_window = min(len(bandwidth.dropna()), 100)
     if rank_window < 20:
         return {"is_squeeze": False, "is_expanding": False, "bandwidth_percentile": 0.5}
 
-    percentile = bandwidth.rolling(window=rank_window).rank(pct=True).iloc[-1]
+    percentile = last_rolling_percentile(bandwidth, rank_window)
     
     is_squeeze = percentile < 0.25
     
@@ -617,6 +745,7 @@ def calculate_bharatquant_v4(logging, stock_id: str, df_daily_input=None, df_hou
     """
     symbol = stock_id.upper()
     logging.info(f"Starting BharatQuant v4 analysis for {symbol}")
+    timer = metrics.StageTimer()
     
     # 1. Fetch Multi-Timeframe Data
     if df_daily_input is not None and df_hourly_input is not None:
@@ -624,9 +753,10 @@ def calculate_bharatquant_v4(logging, stock_id: str, df_daily_input=None, df_hou
         df_hourly = df_hourly_input
     else:
         # Daily data for Macro (1y lookback)
-        df_daily = yf.download(symbol, period="1y", interval="1d", progress=False, auto_adjust=False)
+        df_daily = fetch_ohlcv(symbol, "1y", "1d")
         # Hourly data for Structure and Signals (60d lookback for 1h is usually the limit for yfinance)
-        df_hourly = yf.download(symbol, period="60d", interval="1h", progress=False, auto_adjust=False)
+        df_hourly = fetch_ohlcv(symbol, "60d", "1h")
+        timer.mark("fetch")
     
     if df_daily.empty or df_hourly.empty:
         return {"error": f"Missing data for {symbol}"}
@@ -637,10 +767,14 @@ def calculate_bharatquant_v4(logging, stock_id: str, df_daily_input=None, df_hou
     if isinstance(df_hourly.columns, pd.MultiIndex):
         df_hourly.columns = df_hourly.columns.get_level_values(0)
 
+    # Derived series are computed once per timeframe and shared by every layer
+    features_daily = FeatureFrame(df_daily)
+    features_hourly = FeatureFrame(df_hourly)
+
     # 2. Layer 1: Macro Trend (Daily)
-    close_daily = df_daily['Close']
-    ema50_d = close_daily.ewm(span=50, adjust=False).mean()
-    ema200_d = close_daily.ewm(span=200, adjust=False).mean()
+    close_daily = features_daily.close
+    ema50_d = features_daily.ema(50)
+    ema200_d = features_daily.ema(200)
     
     latest_price_d = close_daily.iloc[-1]
     latest_ema50_d = ema50_d.iloc[-1]
@@ -649,41 +783,36 @@ def calculate_bharatquant_v4(logging, stock_id: str, df_daily_input=None, df_hou
     # Golden Zone: Price > EMA200 and EMA50 > EMA200
     is_bullish_macro = latest_price_d > latest_ema200_d and latest_ema50_d > latest_ema200_d
     macro_res = {'is_bullish_macro': is_bullish_macro}
+    timer.mark("macro")
 
     # 3. Layer 2: Market Structure (Hourly)
     structure_res = detect_market_structure(df_hourly)
+    timer.mark("structure")
     
     # 4. Layer 3: Triggers (Hourly)
     # RSI
-    rsi_dict = calculate_rsi(stock_id, df_hourly, 14, "1h")
+    rsi_dict = calculate_rsi(stock_id, df_hourly, 14, "1h", features_hourly)
+    timer.mark("rsi")
     # MACD
-    macd_res = calculate_macd_signal(stock_id, df_hourly, "1h")
+    macd_res = calculate_macd_signal(stock_id, df_hourly, "1h", features_hourly)
+    timer.mark("macd")
     # Bollinger Bands
-    bb_res = calculate_bollinger_bands(stock_id, df_hourly, 20, 2)
+    bb_res = calculate_bollinger_bands(stock_id, df_hourly, 20, 2, features_hourly)
+    timer.mark("bb")
     # CMF
-    cmf_res = calculate_cmf(stock_id, df_hourly, "14", "1h", 20)
+    cmf_res = calculate_cmf(stock_id, df_hourly, "14", "1h", 20, features_hourly)
+    timer.mark("cmf")
     
     # ATR for TP/SL
-    high_h = df_hourly['High']
-    low_h = df_hourly['Low']
-    close_h = df_hourly['Close']
-    tr = pd.concat([high_h - low_h, (high_h - close_h.shift()).abs(), (low_h - close_h.shift()).abs()], axis=1).max(axis=1)
-    atr_h = tr.rolling(window=14).mean().iloc[-1]
-    
-    # RSI Divergence
-    # We need a series for RSI divergence detection
-    close_h = df_hourly['Close']
-    delta = close_h.diff()
-    gain = delta.clip(lower=0)
-    loss = -delta.clip(upper=0)
-    avg_gain = gain.ewm(alpha=1/14, min_periods=14, adjust=False).mean()
-    avg_loss = loss.ewm(alpha=1/14, min_periods=14, adjust=False).mean()
-    rs = avg_gain / avg_loss
-    rsi_series = 100 - (100 / (1 + rs))
-    
-    rsi_div_res = detect_rsi_divergence(df_hourly, rsi_series)
-    # BB Squeeze
-    bb_sq_res = detect_bb_squeeze(df_hourly)
+    atr_h = features_hourly.true_range.rolling(window=14).mean().iloc[-1]
+    timer.mark("atr")
+    
+    # RSI Divergence (reuses the hourly RSI series computed above)
+    rsi_div_res = detect_rsi_divergence(df_hourly, features_hourly.rsi(14))
+    timer.mark("divergence")
+    # BB Squeeze (reuses the 20-bar bands computed above)
+    bb_sq_res = detect_bb_squeeze(df_hourly, features=features_hourly)
+    timer.mark("squeeze")
     
     # 5. Aggregate
     final_res = signal_aggregator_v4(
@@ -698,7 +827,7 @@ def calculate_bharatquant_v4(logging, stock_id: str, df_daily_input=None, df_hou
     
     # 6. Set TP/SL if BUY
     if final_res['buy']:
-        latest_price = float(df_hourly['Close'].iloc[-1])
+        latest_price = float(features_hourly.close.iloc[-1])
         final_res['entry_price'] = latest_price
         final_res['take_profit'] = round(latest_price + (1.5 * float(atr_h)), 2)
         if structure_res.get('last_trough'):
@@ -713,5 +842,101 @@ def calculate_bharatquant_v4(logging, stock_id: str, df_daily_input=None, df_hou
         'bb': bb_res,
         'cmf': cmf_res
     }
-    logging.info("Response: ",to_native(final_res))
-    return to_native(final_res)
\ No newline at end of file
+    timer.mark("aggregation")
+    # NumPy scalars are left as they are; the API response class serializes them directly
+    logging.info("Response: %s", final_res)
+    return final_res
+
+def download_batch(symbols, interval: str, period: str = None, start=None):
+    """
+    Downloads bars for several symbols in one request from the configured market data provider.
+    """
+    provider = market_data.get_provider()
+    with metrics.DOWNLOAD_SECONDS.labels(interval, provider.name).time():
+        return provider.download(symbols, interval, period=period, start=start)
+
+def fetch_bars(symbols, period: str, interval: str, ttl_seconds: float = None, refresh: bool = False):
+    """
+    Returns {symbol: frame} for the given period. Frames are served from the in-memory frame cache
+    (or, when SHARED_BAR_DIR is set, from the memory-mapped cache shared by every process of the pod),
+    then from the on-disk bar store when BAR_STORE_DIR is set, and only then downloaded.
+    `refresh` skips the in-memory lookup, and `ttl_seconds` overrides how long the fetched frames stay cached.
+    """
+    def fetch_uncached(missing):
+        if bar_store is not None:
+            return bar_store.get_bars(missing, period, interval, download_batch)
+        return download_batch(missing, interval, period=period)
+
+    if shared_bars is not None:
+        frames = shared_bars.get_many(symbols, interval, period, fetch_uncached, ttl_seconds, refresh)
+    elif frame_cache is None:
+        frames = fetch_uncached(symbols)
+    else:
+        keys = [(symbol, interval, period) for symbol in symbols]
+        cached = frame_cache.get_many(keys, lambda missing: {
+            (symbol, interval, period): frame
+            for symbol, frame in fetch_uncached([key[0] for key in missing]).items()
+        }, ttl_seconds, refresh)
+        frames = {key[0]: frame for key, frame in cached.items()}
+    return {symbol: frames.get(symbol) if frames.get(symbol) is not None else pd.DataFrame() for symbol in symbols}
+
+def fetch_ohlcv(stock_id: str, period: str, interval: str):
+    symbol = stock_id.upper()
+    return fetch_bars([symbol], period, interval)[symbol]
+
+def compute_bharatquant_v4(stock_id: str, df_daily, df_hourly):
+    """
+    Process-pool entry point: runs the indicator and aggregation stage of BharatQuant v4 on pre-fetched frames.
+    """
+    return calculate_bharatquant_v4(logging, stock_id, df_daily, df_hourly)
+
+def warm_worker():
+    """
+    Short task used to start process-pool workers before the first request.
+    It sleeps briefly so each warm-up task lands on a different worker.
+    """
+    time.sleep(0.2)
+    return os.getpid()
+
+def calculate_bharatquant_v4_batch(logging, stock_ids, chunk_size: int = 100, executor=None):
+    """
+    Runs BharatQuant v4 for a list of stocks using grouped downloads (two per chunk instead of two per stock).
+    When a process pool executor is given, the indicator stage of each stock runs on it, and BrokenProcessPool
+    propagates when one of its workers dies.
+    """
+    results = {}
+    errors = {}
+    symbols = list(dict.fromkeys(stock_id.upper() for stock_id in stock_ids))
+    logging.info(f"Starting BharatQuant v4 batch analysis for {len(symbols)} stocks")
+
+    for start in range(0, len(symbols), chunk_size):
+        chunk = symbols[start:start + chunk_size]
+        try:
+            daily_frames = fetch_bars(chunk, "1y", "1d")
+            hourly_frames = fetch_bars(chunk, "60d", "1h")
+        except Exception as e:
+            logging.error(f"Batch download failed for chunk starting at {start}: {str(e)}")
+            for symbol in chunk:
+                errors[symbol] = f"Download failed: {str(e)}"
+            continue
+
+        if executor is not None:
+            futures = {symbol: executor.submit(compute_bharatquant_v4, symbol, daily_frames[symbol], hourly_frames[symbol]) for symbol in chunk}
+        for symbol in chunk:
+            try:
+                if executor is not None:
+                    result = futures[symbol].result()
+                else:
+                    result = calculate_bharatquant_v4(logging, symbol, daily_frames[symbol], hourly_frames[symbol])
+                if "error" in result:
+                    errors[symbol] = result["error"]
+                else:
+                    results[symbol] = result
+            except BrokenProcessPool:
+                # A dead worker breaks every pending future; the caller decides whether to replace the pool
+                raise
+            except Exception as e:
+                errors[symbol] = f"Failed to process stock data: {str(e)}"
+
+    logging.info(f"Batch analysis completed. Results: {len(results)}, Errors: {len(errors)}")
+    return {"results": results, "errors": errors}
@@ -0,0 +1,55 @@
+"""
+Deterministic synthetic OHLCV bars shaped like yfinance NSE downloads (used by benchmarks and offline runs).
+"""
+import zlib
+import numpy as np
+import pandas as pd
+
+NSE_TZ = "Asia/Kolkata"
+# yfinance labels NSE hourly bars by their start: 09:15, 10:15, ..., 15:15 (the last one is 15 minutes long)
+HOURLY_BAR_STARTS = ["09:15", "10:15", "11:15", "12:15", "13:15", "14:15", "15:15"]
+
+def symbol_seed(symbol: str, salt: int = 0) -> int:
+    return zlib.crc32(symbol.encode()) ^ salt
+
+def bar_index(bars: int, interval: str, end=None) -> pd.DatetimeIndex:
+    """
+    Timestamps of the last `bars` NSE bars (business days only) up to `end` (default: today).
+    """
+    end_day = pd.Timestamp(end if end is not None else pd.Timestamp.now(tz=NSE_TZ)).normalize()
+    if end_day.tzinfo is not None:
+        end_day = end_day.tz_localize(None)
+    if interval == "1d":
+        return pd.bdate_range(end=end_day, periods=bars)
+    if interval == "1h":
+        days = pd.bdate_range(end=end_day, periods=bars // len(HOURLY_BAR_STARTS) + 1)
+        stamps = [day + pd.Timedelta(start + ":00") for day in days for start in HOURLY_BAR_STARTS]
+        return pd.DatetimeIndex(stamps[-bars:]).tz_localize(NSE_TZ)
+    raise ValueError(f"Unsupported interval: {interval}")
+
+def make_bars(symbol: str, bars: int, interval: str, end=None, seed: int = 0) -> pd.DataFrame:
+    """
+    Geometric random walk with a symbol-specific drift and volatility, returned with yfinance column names.
+    The same (symbol, bars, interval, end, seed) always gives the same frame.
+    """
+    rng = np.random.default_rng(symbol_seed(symbol, seed) + (0 if interval == "1d" else 1))
+    index = bar_index(bars, interval, end)
+    scale = 1.0 if interval == "1d" else 0.4
+    drift = rng.normal(0.0004, 0.0008) * scale
+    volatility = rng.uniform(0.008, 0.025) * scale
+    start_price = rng.uniform(50, 3000)
+
+    close = start_price * np.exp(np.cumsum(rng.normal(drift, volatility, len(index))))
+    open_ = np.concatenate([[start_price], close[:-1]]) * (1 + rng.normal(0, volatility / 4, len(index)))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, volatility / 2, len(index))))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, volatility / 2, len(index))))
+    volume = rng.lognormal(mean=13, sigma=0.6, size=len(index)).round()
+
+    return pd.DataFrame({
+        "Adj Close": close,
+        "Close": close,
+        "High": high,
+        "Low": low,
+        "Open": open_,
+        "Volume": volume
+    }, index=index.rename("Date" if interval == "1d" else "Datetime"))